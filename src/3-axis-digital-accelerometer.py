@@ -6,10 +6,19 @@
 #
 # ------------------------------------------------------------------------------------------
 
-from microbit import sleep, i2c, display, button_b
+from microbit import sleep, i2c, display, button_b, pin1, uart
+from ustruct import pack, unpack as unp
+from utime import ticks_us, ticks_diff
+from array import array
+from math import atan2, sqrt, degrees
+import gc
 
 _DEFAULT_ADDRESS = 0x19
 
+MODE_LOW_POWER       = 0 # 8-bit output
+MODE_NORMAL          = 1 # 10-bit output
+MODE_HIGH_RESOLUTION = 2 # 12-bit output
+
 # _LIS3DHTR Register Map
 _LIS3DHTR_REG_WHOAMI                 = 0x0F # Who Am I Register
 _LIS3DHTR_REG_CTRL1                  = 0x20 # Control Register-1
@@ -26,6 +35,15 @@ _LIS3DHTR_REG_OUT_Y_L                = 0x2A # Y-Axis LSB
 _LIS3DHTR_REG_OUT_Y_H                = 0x2B # Y-Axis MSB
 _LIS3DHTR_REG_OUT_Z_L                = 0x2C # Z-Axis LSB
 _LIS3DHTR_REG_OUT_Z_H                = 0x2D # Z-Axis MSB
+_LIS3DHTR_REG_FIFO_CTRL              = 0x2E # FIFO Control Register
+_LIS3DHTR_REG_FIFO_SRC               = 0x2F # FIFO Source Register
+_LIS3DHTR_REG_INT1_CFG               = 0x30 # Interrupt 1 Configuration
+_LIS3DHTR_REG_INT1_SRC               = 0x31 # Interrupt 1 Source
+_LIS3DHTR_REG_INT1_THS               = 0x32 # Interrupt 1 Threshold
+_LIS3DHTR_REG_INT1_DURATION          = 0x33 # Interrupt 1 Duration
+
+# Sub-address auto-increment, set on the register address for multi-byte reads
+_LIS3DHTR_AUTO_INCREMENT             = 0x80
  
 # Accl Datarate configuration
 _LIS3DHTR_ACCL_DR_PD                 = 0x00 # Power down mode
@@ -38,9 +56,13 @@ _LIS3DHTR_ACCL_DR_200                = 0x60 # ODR = 200 Hz
 _LIS3DHTR_ACCL_DR_400                = 0x70 # ODR = 400 Hz
 _LIS3DHTR_ACCL_DR_1620               = 0x80 # ODR = 1.620 KHz
 _LIS3DHTR_ACCL_DR_1344               = 0x90 # ODR = 1.344 KHz
+_LIS3DHTR_ACCL_DATARATES             = (_LIS3DHTR_ACCL_DR_PD, _LIS3DHTR_ACCL_DR_1, _LIS3DHTR_ACCL_DR_10, _LIS3DHTR_ACCL_DR_25,
+                                        _LIS3DHTR_ACCL_DR_50, _LIS3DHTR_ACCL_DR_100, _LIS3DHTR_ACCL_DR_200, _LIS3DHTR_ACCL_DR_400,
+                                        _LIS3DHTR_ACCL_DR_1620, _LIS3DHTR_ACCL_DR_1344)
  
 # Accl Data update & Axis configuration
 _LIS3DHTR_ACCL_LPEN                  = 0x00 # Normal Mode, Axis disabled
+_LIS3DHTR_ACCL_LPEN_EN               = 0x08 # Low-Power Mode enabled
 _LIS3DHTR_ACCL_XAXIS                 = 0x04 # X-Axis enabled
 _LIS3DHTR_ACCL_YAXIS                 = 0x02 # Y-Axis enabled
 _LIS3DHTR_ACCL_ZAXIS                 = 0x01 # Z-Axis enabled
@@ -59,9 +81,73 @@ _LIS3DHTR_ST_0                       = 0x02 # Self Test 0
 _LIS3DHTR_ST_1                       = 0x04 # Self Test 1
 _LIS3DHTR_SIM_3                      = 0x01 # 3-Wire Interface
 
+# Control Register-3, routing to INT1
+_LIS3DHTR_I1_IA1                     = 0x40 # Interrupt generator 1 (activity/free-fall)
+_LIS3DHTR_I1_ZYXDA                   = 0x10 # Data ready
+_LIS3DHTR_I1_WTM                     = 0x04 # FIFO watermark
+_LIS3DHTR_I1_OVERRUN                 = 0x02 # FIFO overrun
+
+# Control Register-5
+_LIS3DHTR_FIFO_EN                    = 0x40 # FIFO Enabled
+_LIS3DHTR_LIR_INT1                   = 0x08 # Latch INT1 until INT1_SRC is read
+
+# Interrupt 1 configuration
+_LIS3DHTR_INT1_AOI                   = 0x80 # AND combination of events
+_LIS3DHTR_INT1_XYZ_HIGH              = 0x2A # X, Y or Z above threshold
+_LIS3DHTR_INT1_XYZ_LOW               = 0x15 # X, Y and Z below threshold
+_LIS3DHTR_INT1_SRC_IA                = 0x40 # Interrupt active
+_LIS3DHTR_INT1_THS_MASK              = 0x7F
+
+# FIFO mode selection
+_LIS3DHTR_FIFO_BYPASS                = 0x00 # Bypass mode, FIFO disabled
+_LIS3DHTR_FIFO_MODE                  = 0x40 # FIFO mode, stops collecting when full
+_LIS3DHTR_FIFO_STREAM                = 0x80 # Stream mode, oldest samples overwritten when full
+_LIS3DHTR_FIFO_WTM_MASK              = 0x1F # Watermark level
+
+# FIFO source
+_LIS3DHTR_FIFO_SRC_WTM               = 0x80 # Watermark level reached
+_LIS3DHTR_FIFO_SRC_OVRN              = 0x40 # FIFO full, samples being overwritten
+_LIS3DHTR_FIFO_SRC_EMPTY             = 0x20 # FIFO empty
+_LIS3DHTR_FIFO_SRC_FSS_MASK          = 0x1F # Number of unread samples
+
+# Sensitivity in mg/digit indexed by [mode][range], see datasheet table 4
+_LIS3DHTR_SENSITIVITY = (
+    (16, 32, 64, 192),                  # Low-power
+    (4, 8, 16, 48),                     # Normal
+    (1, 2, 4, 12)                       # High-resolution
+)
+_LIS3DHTR_OUTPUT_SHIFT = (8, 6, 4)      # Output is left-justified in 16 bits, indexed by mode
+_LIS3DHTR_RANGES = (2, 4, 8, 16)
+_LIS3DHTR_THRESHOLD_LSB = (16, 32, 62, 186) # INT1_THS mg/LSB, indexed by range
+_LIS3DHTR_RANGE_BITS = (_LIS3DHTR_ACCL_RANGE_2G, _LIS3DHTR_ACCL_RANGE_4G, _LIS3DHTR_ACCL_RANGE_8G, _LIS3DHTR_ACCL_RANGE_16G)
+
+_LIS3DHTR_FIFO_SIZE                  = 32   # Samples held by the FIFO
+_LIS3DHTR_SAMPLE_SIZE                = 6    # Bytes per XYZ sample
+
+_RECORD_MARKER = b'\xaa\x55' # Precedes each record features() writes to the serial port
+
+def _check_datarate(datarate, mode):
+    # 0x80 is 1.62 kHz in low power mode and not a valid rate otherwise
+    assert datarate in _LIS3DHTR_ACCL_DATARATES, 'Invalid datarate'
+    assert datarate != _LIS3DHTR_ACCL_DR_1620 or mode == MODE_LOW_POWER, '1.62 kHz is only available in low power mode'
+
 class ThreeAxisDigitalAccelerometer:
-    def __init__(self):
+    def __init__(self, datarate = _LIS3DHTR_ACCL_DR_10, g_range = 2, mode = MODE_NORMAL, bdu = False, interrupt_pin = None):
         self._device_address = _DEFAULT_ADDRESS
+        self._command = bytearray(1)
+        self._interrupt_pin = interrupt_pin
+        self._ctrl3 = 0x00
+        self._ctrl5 = 0x00
+
+        assert g_range in _LIS3DHTR_RANGES, 'g_range must be one of 2, 4, 8 or 16'
+        assert mode in (MODE_LOW_POWER, MODE_NORMAL, MODE_HIGH_RESOLUTION), 'Invalid mode'
+        _check_datarate(datarate, mode)
+
+        self._datarate = datarate
+        self._range = g_range
+        self._mode = mode
+        self._bdu = bdu
+        self._scale = 0
 
         self._select_datarate()
         self._select_data_config()
@@ -71,43 +157,301 @@ class ThreeAxisDigitalAccelerometer:
         i2c.write(self._device_address, bytearray([address, data]))
     
     def _read_register(self, address, num_bytes):
-        i2c.write(self._device_address, bytearray([address]))
+        self._command[0] = address
+        i2c.write(self._device_address, self._command)
         return i2c.read(_DEFAULT_ADDRESS, num_bytes)
     
     def _select_datarate(self):
-        data = (_LIS3DHTR_ACCL_DR_10 | _LIS3DHTR_ACCL_XAXIS | _LIS3DHTR_ACCL_YAXIS | _LIS3DHTR_ACCL_ZAXIS)
+        data = (self._datarate | _LIS3DHTR_ACCL_XAXIS | _LIS3DHTR_ACCL_YAXIS | _LIS3DHTR_ACCL_ZAXIS)
+        if self._mode == MODE_LOW_POWER:
+            data |= _LIS3DHTR_ACCL_LPEN_EN
         self._write_register(_LIS3DHTR_REG_CTRL1, data)
  
     def _select_data_config(self):
-        data = (_LIS3DHTR_ACCL_RANGE_2G | _LIS3DHTR_BDU_CONT | _LIS3DHTR_HR_DS)
+        index = _LIS3DHTR_RANGES.index(self._range)
+
+        data = _LIS3DHTR_RANGE_BITS[index]
+        data |= _LIS3DHTR_BDU_NOT_CONT if self._bdu else _LIS3DHTR_BDU_CONT
+        data |= _LIS3DHTR_HR_EN if self._mode == MODE_HIGH_RESOLUTION else _LIS3DHTR_HR_DS
         self._write_register(_LIS3DHTR_REG_CTRL4, data)
+
+        # g per raw 16-bit count, so read() needs a single multiply per axis
+        self._scale = _LIS3DHTR_SENSITIVITY[self._mode][index] / 1000 / (1 << _LIS3DHTR_OUTPUT_SHIFT[self._mode])
+
+    def set_datarate(self, datarate):
+        _check_datarate(datarate, self._mode)
+        self._datarate = datarate
+        self._select_datarate()
+
+    def set_range(self, g_range):
+        assert g_range in _LIS3DHTR_RANGES, 'g_range must be one of 2, 4, 8 or 16'
+        self._range = g_range
+        self._select_data_config()
+
+    def set_mode(self, mode):
+        assert mode in (MODE_LOW_POWER, MODE_NORMAL, MODE_HIGH_RESOLUTION), 'Invalid mode'
+        _check_datarate(self._datarate, mode)
+        self._mode = mode
+        self._select_datarate()
+        self._select_data_config()
+
+    def set_bdu(self, enabled):
+        self._bdu = enabled
+        self._select_data_config()
     
     def read(self):
-        data0 = self._read_register(_LIS3DHTR_REG_OUT_Y_L, 1)[0]
-        data1 = self._read_register(_LIS3DHTR_REG_OUT_Y_H, 1)[0]
-        
-        xAccl = data1 * 256 + data0
-        if xAccl > 32767 :
-            xAccl -= 65536
-        xAccl /= 16000
-       
-        data0 = self._read_register(_LIS3DHTR_REG_OUT_Y_L, 1)[0]
-        data1 = self._read_register(_LIS3DHTR_REG_OUT_Y_H, 1)[0]
-       
-        yAccl = data1 * 256 + data0
-        if yAccl > 32767 :
-            yAccl -= 65536
-        yAccl /= 16000
-
-        data0 = self._read_register(_LIS3DHTR_REG_OUT_Z_L, 1)[0]
-        data1 = self._read_register(_LIS3DHTR_REG_OUT_Z_H, 1)[0]
- 
-        zAccl = data1 * 256 + data0
-        if zAccl > 32767 :
-            zAccl -= 65536
-        zAccl /= 16000
+        # Fetch OUT_X_L..OUT_Z_H in a single auto-increment transaction
+        data = self._read_register(_LIS3DHTR_REG_OUT_X_L | _LIS3DHTR_AUTO_INCREMENT, 6)
+        xAccl, yAccl, zAccl = unp('<hhh', data)
+
+        scale = self._scale
+        return {'x' : xAccl * scale, 'y' : yAccl * scale, 'z' : zAccl * scale}
+
+    def read_into(self, buffer):
+        # Stores raw X, Y, Z counts in a preallocated array('h') or array('f'); multiply
+        # by scale() to convert to g. Decoding by hand avoids the tuple built by unpack
+        data = self._read_register(_LIS3DHTR_REG_OUT_X_L | _LIS3DHTR_AUTO_INCREMENT, 6)
 
-        return {'x' : xAccl, 'y' : yAccl, 'z' : zAccl}
+        buffer[0] = (data[0] | (data[1] << 8)) - ((data[1] & 0x80) << 9)
+        buffer[1] = (data[2] | (data[3] << 8)) - ((data[3] & 0x80) << 9)
+        buffer[2] = (data[4] | (data[5] << 8)) - ((data[5] & 0x80) << 9)
+
+    def scale(self):
+        return self._scale
+
+    def start_stream(self, watermark = 16):
+        # Clear any stale samples by passing through bypass mode before streaming
+        self._ctrl5 |= _LIS3DHTR_FIFO_EN
+        self._write_register(_LIS3DHTR_REG_CTRL5, self._ctrl5)
+        self._write_register(_LIS3DHTR_REG_FIFO_CTRL, _LIS3DHTR_FIFO_BYPASS)
+        self._write_register(_LIS3DHTR_REG_FIFO_CTRL, _LIS3DHTR_FIFO_STREAM | (watermark & _LIS3DHTR_FIFO_WTM_MASK))
+
+    def stop_stream(self):
+        self._write_register(_LIS3DHTR_REG_FIFO_CTRL, _LIS3DHTR_FIFO_BYPASS)
+        self._ctrl5 &= ~_LIS3DHTR_FIFO_EN
+        self._write_register(_LIS3DHTR_REG_CTRL5, self._ctrl5)
+
+    def fifo_level(self):
+        status = self._read_register(_LIS3DHTR_REG_FIFO_SRC, 1)[0]
+
+        if status & _LIS3DHTR_FIFO_SRC_OVRN:
+            return _LIS3DHTR_FIFO_SIZE
+        
+        if status & _LIS3DHTR_FIFO_SRC_EMPTY:
+            return 0
+
+        return status & _LIS3DHTR_FIFO_SRC_FSS_MASK
+
+    def drain(self, buffer):
+        # Fills buffer (bytearray of little-endian XYZ triplets or array('h')) with as many
+        # pending samples as it can hold and returns the number of samples copied
+        if isinstance(buffer, bytearray):
+            capacity = len(buffer) // _LIS3DHTR_SAMPLE_SIZE
+        else:
+            capacity = len(buffer) // 3
+
+        count = min(self.fifo_level(), capacity)
+        if count == 0:
+            return 0
+
+        # With the FIFO enabled the auto-increment address wraps from OUT_Z_H back to
+        # OUT_X_L, so all pending samples come out in a single transaction
+        num_bytes = count * _LIS3DHTR_SAMPLE_SIZE
+        data = self._read_register(_LIS3DHTR_REG_OUT_X_L | _LIS3DHTR_AUTO_INCREMENT, num_bytes)
+
+        if isinstance(buffer, bytearray):
+            buffer[0:num_bytes] = data
+        else:
+            # Sign-extended by hand as in read_into(), unpack_from would build a tuple
+            # per value
+            for i in range(count * 3):
+                low = data[2 * i]
+                high = data[2 * i + 1]
+                buffer[i] = (low | (high << 8)) - ((high & 0x80) << 9)
+
+        return count
+
+    def _route_interrupt(self, source):
+        self._ctrl3 |= source
+        self._write_register(_LIS3DHTR_REG_CTRL3, self._ctrl3)
+
+    def _threshold(self, milli_g):
+        lsb = _LIS3DHTR_THRESHOLD_LSB[_LIS3DHTR_RANGES.index(self._range)]
+        return min(milli_g // lsb, _LIS3DHTR_INT1_THS_MASK)
+
+    def _configure_generator(self, config, milli_g, duration):
+        # Duration is counted in samples at the current data rate
+        self._ctrl5 |= _LIS3DHTR_LIR_INT1
+        self._write_register(_LIS3DHTR_REG_CTRL5, self._ctrl5)
+        self._write_register(_LIS3DHTR_REG_INT1_THS, self._threshold(milli_g))
+        self._write_register(_LIS3DHTR_REG_INT1_DURATION, duration & 0x7F)
+        self._write_register(_LIS3DHTR_REG_INT1_CFG, config)
+        self._route_interrupt(_LIS3DHTR_I1_IA1)
+        self.interrupt_source()
+
+    def enable_data_ready_interrupt(self):
+        self._route_interrupt(_LIS3DHTR_I1_ZYXDA)
+
+    def enable_watermark_interrupt(self):
+        self._route_interrupt(_LIS3DHTR_I1_WTM)
+
+    def enable_activity_interrupt(self, milli_g = 1200, duration = 0):
+        self._configure_generator(_LIS3DHTR_INT1_XYZ_HIGH, milli_g, duration)
+
+    def enable_free_fall_interrupt(self, milli_g = 350, duration = 3):
+        self._configure_generator(_LIS3DHTR_INT1_AOI | _LIS3DHTR_INT1_XYZ_LOW, milli_g, duration)
+
+    def disable_interrupts(self):
+        self._ctrl3 = 0x00
+        self._ctrl5 &= ~_LIS3DHTR_LIR_INT1
+        self._write_register(_LIS3DHTR_REG_CTRL3, self._ctrl3)
+        self._write_register(_LIS3DHTR_REG_INT1_CFG, 0x00)
+        self._write_register(_LIS3DHTR_REG_CTRL5, self._ctrl5)
+
+    def interrupt_pending(self):
+        # Reads the INT1 line wired to the micro:bit pin, no bus traffic involved
+        assert self._interrupt_pin is not None, 'interrupt_pending needs the interrupt_pin INT1 is wired to'
+        return self._interrupt_pin.read_digital() == 1
+
+    def interrupt_source(self):
+        # Reading INT1_SRC releases a latched activity/free-fall interrupt
+        return self._read_register(_LIS3DHTR_REG_INT1_SRC, 1)[0]
+
+def _isqrt(value):
+    if value <= 0:
+        return 0
+    
+    x = value
+    y = (x + 1) >> 1
+    while y < x:
+        x = y
+        y = (x + value // x) >> 1
+    
+    return x
+
+class MotionFeatures:
+    # Layout of a packed feature record: mean x/y/z, variance x/y/z, peak magnitude,
+    # pitch, roll, steps and shakes. Means, variances and peak are in raw counts >> 4
+    RECORD_FORMAT = '<hhhIIIHhhBB'
+    
+    def __init__(self, scale, window = 32, hop = None, step_threshold = 1200, shake_threshold = 2500):
+        # scale is the sensor's g per raw count, thresholds are vector magnitudes in mg
+        self._window = window
+        self._hop = hop if hop else window
+        
+        self._samples = array('h', [0] * (window * 3))
+        self._index = 0
+        self._count = 0
+        self._pending = 0
+        
+        self._sum_x = 0
+        self._sum_y = 0
+        self._sum_z = 0
+        self._sum_sq_x = 0
+        self._sum_sq_y = 0
+        self._sum_sq_z = 0
+        
+        # Samples are stored >> 4 (no mode has significant bits below that), so convert
+        # the thresholds once into squared counts of the same resolution
+        counts_per_mg = 1 / (scale * 16 * 1000)
+        self._rearm_sq = int((1000 + step_threshold) / 2 * counts_per_mg) ** 2
+        self._step_sq = int(step_threshold * counts_per_mg) ** 2
+        self._shake_sq = int(shake_threshold * counts_per_mg) ** 2
+        
+        self._peak_sq = 0
+        self._steps = 0
+        self._shakes = 0
+        self._step_armed = True
+        self._shake_armed = True
+    
+    def update(self, x, y, z):
+        # Feed one raw sample, returns a feature record tuple every hop samples once the
+        # window has filled, otherwise None
+        x >>= 4
+        y >>= 4
+        z >>= 4
+        
+        samples = self._samples
+        i = self._index * 3
+        
+        if self._count == self._window:
+            old = samples[i]
+            self._sum_x -= old
+            self._sum_sq_x -= old * old
+            old = samples[i + 1]
+            self._sum_y -= old
+            self._sum_sq_y -= old * old
+            old = samples[i + 2]
+            self._sum_z -= old
+            self._sum_sq_z -= old * old
+        else:
+            self._count += 1
+        
+        samples[i] = x
+        samples[i + 1] = y
+        samples[i + 2] = z
+        
+        self._sum_x += x
+        self._sum_y += y
+        self._sum_z += z
+        self._sum_sq_x += x * x
+        self._sum_sq_y += y * y
+        self._sum_sq_z += z * z
+        
+        self._index += 1
+        if self._index == self._window:
+            self._index = 0
+        
+        magnitude_sq = x * x + y * y + z * z
+        if magnitude_sq > self._peak_sq:
+            self._peak_sq = magnitude_sq
+        
+        # Rising threshold crossings count as events, re-armed once the magnitude falls
+        # back towards rest (1g) to give some hysteresis
+        if magnitude_sq > self._step_sq:
+            if self._step_armed:
+                self._steps += 1
+                self._step_armed = False
+        elif magnitude_sq < self._rearm_sq:
+            self._step_armed = True
+        
+        if magnitude_sq > self._shake_sq:
+            if self._shake_armed:
+                self._shakes += 1
+                self._shake_armed = False
+        elif magnitude_sq < self._step_sq:
+            self._shake_armed = True
+        
+        self._pending += 1
+        if self._pending < self._hop or self._count < self._window:
+            return None
+        
+        self._pending = 0
+        return self._record()
+    
+    def _record(self):
+        n = self._count
+        
+        mean_x = self._sum_x // n
+        mean_y = self._sum_y // n
+        mean_z = self._sum_z // n
+        
+        var_x = (self._sum_sq_x - self._sum_x * self._sum_x // n) // n
+        var_y = (self._sum_sq_y - self._sum_y * self._sum_y // n) // n
+        var_z = (self._sum_sq_z - self._sum_z * self._sum_z // n) // n
+        
+        # Tilt only needs evaluating once per record so floating point is acceptable here
+        pitch = round(degrees(atan2(-mean_x, sqrt(mean_y * mean_y + mean_z * mean_z))))
+        roll = round(degrees(atan2(mean_y, mean_z)))
+        
+        record = (mean_x, mean_y, mean_z, var_x, var_y, var_z, _isqrt(self._peak_sq), pitch, roll,
+                  min(self._steps, 255), min(self._shakes, 255))
+        
+        self._peak_sq = 0
+        self._steps = 0
+        self._shakes = 0
+        
+        return record
 
 def main():
     sensor = ThreeAxisDigitalAccelerometer()
@@ -128,6 +472,70 @@ def main():
         print("")
     
         sleep(500)
+
+def wakeup():
+    # Requires the board's INT1 pad to be wired to pin1
+    sensor = ThreeAxisDigitalAccelerometer(interrupt_pin = pin1)
+    sensor.enable_activity_interrupt()
+    
+    display.clear()
+    display.show('>')
+    
+    while True:
+        if button_b.was_pressed():
+            sensor.disable_interrupts()
+            display.clear()
+            break
+        
+        if sensor.interrupt_pending():
+            sensor.interrupt_source()
+            accl = sensor.read()
+            print("Motion: x={} y={} z={}".format(accl['x'], accl['y'], accl['z']))
+        
+        sleep(20)
+
+def features():
+    sensor = ThreeAxisDigitalAccelerometer(datarate = _LIS3DHTR_ACCL_DR_100)
+    extractor = MotionFeatures(sensor.scale())
+    buffer = array('h', [0, 0, 0])
+    
+    display.clear()
+    display.show('>')
+    
+    while True:
+        if button_b.was_pressed():
+            display.clear()
+            break
+        
+        sensor.read_into(buffer)
+        record = extractor.update(buffer[0], buffer[1], buffer[2])
+        
+        # Records go out raw over the USB serial, each behind a two byte marker so the
+        # host can find the record boundaries: scan for b'\xaa\x55', then unpack the
+        # following calcsize(RECORD_FORMAT) bytes with struct and the same format
+        if record:
+            uart.write(_RECORD_MARKER + pack(MotionFeatures.RECORD_FORMAT, *record))
+        
+        sleep(10)
+
+def benchmark(samples = 50):
+    sensor = ThreeAxisDigitalAccelerometer()
+    buffer = array('h', [0, 0, 0])
+    
+    for name, sample in (('read', lambda: sensor.read()), ('read_into', lambda: sensor.read_into(buffer))):
+        gc.collect()
+        gc.disable()
+        
+        free = gc.mem_free()
+        start = ticks_us()
+        for _ in range(samples):
+            sample()
+        elapsed = ticks_diff(ticks_us(), start)
+        used = free - gc.mem_free()
+        
+        gc.enable()
+        
+        print("{}: {} us/sample, {} bytes/sample".format(name, elapsed // samples, used // samples))
         
 if __name__ == '__main__':
     main()
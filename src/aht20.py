@@ -6,80 +6,11 @@
 #
 # ------------------------------------------------------------------------------------------
 
-from micropython import const
-from microbit import i2c, sleep, display, button_b
-from utime import sleep_ms
+from microbit import sleep, display, button_b
+from ahtx0 import Ahtx0
 
-_DEFAULT_ADDRESS         = const(0x38)
+Aht20 = Ahtx0
 
-_AHTX0_CMD_INITIALIZE    = const(0xBE)
-_AHTX0_CMD_TRIGGER       = const(0xAC)
-_AHTX0_CMD_SOFTRESET     = const(0xBA)
-_AHTX0_STATUS_BUSY       = const(0x80)
-_AHTX0_STATUS_CALIBRATED = const(0x08)
-
-class Aht20:
-    def __init__(self):
-        self._device_address = _DEFAULT_ADDRESS
-        self._buffer = bytearray(6)
-
-        self._reset()
-        if not self._initialize():
-            raise RuntimeError("Initialization failure")
-
-    def _write_register(self, data):
-        i2c.write(self._device_address, bytearray(data))
-    
-    def _read_register(self, num_bytes):
-        # i2c.write(self._device_address, bytearray([address]))
-        return i2c.read(_DEFAULT_ADDRESS, num_bytes)
-    
-    def _reset(self):
-        self._write_register([_AHTX0_CMD_SOFTRESET])
-        sleep_ms(20)
-    
-    def _initialize(self):
-        self._write_register([_AHTX0_CMD_INITIALIZE, 0x08, 0x00])
-        self._wait_for_idle()
-        
-        if not self._get_status() & _AHTX0_STATUS_CALIBRATED:
-            return False
-        
-        return True
-    
-    def _wait_for_idle(self):
-        while self._get_status() & _AHTX0_STATUS_BUSY:
-            sleep_ms(5)
-    
-    def _read_data(self):
-        self._write_register([_AHTX0_CMD_TRIGGER, 0x33, 0x00])
-        self._wait_for_idle()
-        self._buffer = self._read_register(6)
-        
-    def _get_status(self):
-        self._buffer = self._read_register(6)
-        # print("status: " + hex(self._buffer[0]))
-        return self._buffer[0]
-    
-    def temperature(self, fahrenheit = False):
-        self._read_data()
-        
-        temp = ((self._buffer[3] & 0xF) << 16) | (self._buffer[4] << 8) | self._buffer[5]
-        temp = ((temp * 200.0) / 0x100000) - 50
-        
-        if fahrenheit:
-            temp = (temp * 9/5) + 32
-
-        return round(temp, 1)
-    
-    def relative_humidity(self):
-        self._read_data()
-        
-        humidity = (self._buffer[1] << 12) | (self._buffer[2] << 4) | (self._buffer[3] >> 4)
-        humidity = (humidity * 100) / 0x100000
-        
-        return round(humidity, 1)
-    
 def main():
     sensor = Aht20()
     
@@ -99,5 +30,23 @@ def main():
         
         sleep(5000)
     
+def footprint():
+    # The AHT20 and DHT20 examples each used to carry a full copy of the driver. Compares
+    # importing two copies of it against importing the shared module once. Needs
+    # sundry/measure.py alongside
+    from measure import import_cost, copy_module, remove_modules
+    
+    copies = ('_ahtx0_a', '_ahtx0_b')
+    for name in copies:
+        copy_module('ahtx0.py', name)
+    
+    separate = import_cost(copies)
+    shared = import_cost(('ahtx0',))
+    remove_modules(copies)
+    
+    print("Two copies: {} bytes, {} us".format(separate[1], separate[2]))
+    print("Shared: {} bytes, {} us".format(shared[1], shared[2]))
+    print("Saving: {} bytes, {} us".format(separate[1] - shared[1], separate[2] - shared[2]))
+    
 if __name__ == '__main__':
     main()
@@ -0,0 +1,126 @@
+# ------------------------------------------------------------------------------------------
+# Copyright James A. Dooley 2021.
+#
+# Distributed under the MIT License.
+# (See accompanying file license.md file or copy at http://opensource.org/licenses/MIT)
+#
+# ------------------------------------------------------------------------------------------
+
+# Shared driver for the AHT20 and DHT20 (an AHT20 in a Grove housing), copy this file
+# to the micro:bit alongside aht20.py or dht20-temperature-sensor.py
+
+from micropython import const
+from microbit import i2c
+from utime import sleep_ms, ticks_ms, ticks_diff
+
+_DEFAULT_ADDRESS         = const(0x38)
+
+_AHTX0_STATUS_BUSY       = const(0x80)
+_AHTX0_STATUS_CALIBRATED = const(0x08)
+_AHTX0_FRAME_SIZE        = const(7)    # Status, 5 data bytes and CRC
+_AHTX0_CRC_POLYNOMIAL    = const(0x31) # x^8 + x^5 + x^4 + 1, initial value 0xFF
+
+_AHTX0_CMD_INITIALIZE    = b'\xbe\x08\x00'
+_AHTX0_CMD_TRIGGER       = b'\xac\x33\x00'
+_AHTX0_CMD_SOFTRESET     = b'\xba'
+
+def _crc_table():
+    table = bytearray(256)
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ _AHTX0_CRC_POLYNOMIAL) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table[i] = crc
+    return table
+
+_CRC_TABLE = _crc_table()
+
+def _crc8(data, length):
+    crc = 0xFF
+    for i in range(length):
+        crc = _CRC_TABLE[crc ^ data[i]]
+    return crc
+
+class Ahtx0:
+    def __init__(self, max_age_ms = 1000, retries = 3, retry_budget_ms = 20):
+        self._max_age_ms = max_age_ms
+        self._retries = retries
+        self._retry_budget_ms = retry_budget_ms
+        self._crc_failures = 0
+        
+        self._last_measure = None
+        self._sample = (0, 0)
+
+        i2c.write(_DEFAULT_ADDRESS, _AHTX0_CMD_SOFTRESET)
+        sleep_ms(20)
+        
+        i2c.write(_DEFAULT_ADDRESS, _AHTX0_CMD_INITIALIZE)
+        self._wait_for_idle()
+        
+        if not self._get_status() & _AHTX0_STATUS_CALIBRATED:
+            raise RuntimeError("Initialization failure")
+    
+    def _wait_for_idle(self):
+        while self._get_status() & _AHTX0_STATUS_BUSY:
+            sleep_ms(5)
+    
+    def _get_status(self):
+        # The status byte leads every read, so a 1-byte read is enough to check it
+        return i2c.read(_DEFAULT_ADDRESS, 1)[0]
+    
+    def _read_frame(self):
+        # The sensor keeps the last result, so a corrupted frame is simply read again
+        start = ticks_ms()
+        attempt = 0
+        
+        while True:
+            frame = i2c.read(_DEFAULT_ADDRESS, _AHTX0_FRAME_SIZE)
+            if _crc8(frame, _AHTX0_FRAME_SIZE - 1) == frame[_AHTX0_FRAME_SIZE - 1]:
+                return frame
+            
+            self._crc_failures += 1
+            attempt += 1
+            
+            if attempt > self._retries or ticks_diff(ticks_ms(), start) > self._retry_budget_ms:
+                raise RuntimeError("CRC check failed")
+    
+    def start_measurement(self):
+        # Triggers a conversion and returns immediately, poll ready() then call collect()
+        i2c.write(_DEFAULT_ADDRESS, _AHTX0_CMD_TRIGGER)
+    
+    def ready(self):
+        return not self._get_status() & _AHTX0_STATUS_BUSY
+    
+    def collect(self):
+        # Blocks only if the conversion started by start_measurement() is still running
+        self._wait_for_idle()
+        frame = self._read_frame()
+        self._last_measure = ticks_ms()
+        
+        humidity = (frame[1] << 12) | (frame[2] << 4) | (frame[3] >> 4)
+        temp = ((frame[3] & 0xF) << 16) | (frame[4] << 8) | frame[5]
+        
+        self._sample = (((temp * 200.0) / 0x100000) - 50, (humidity * 100) / 0x100000)
+        return self._sample
+    
+    def crc_failures(self):
+        return self._crc_failures
+    
+    def measure(self):
+        # One conversion yields both values, reused until older than max_age_ms
+        if self._last_measure is None or ticks_diff(ticks_ms(), self._last_measure) > self._max_age_ms:
+            self.start_measurement()
+            return self.collect()
+        
+        return self._sample
+    
+    def temperature(self, fahrenheit = False):
+        temp = self.measure()[0]
+        
+        if fahrenheit:
+            temp = (temp * 9/5) + 32
+
+        return round(temp, 1)
+    
+    def relative_humidity(self):
+        return round(self.measure()[1], 1)
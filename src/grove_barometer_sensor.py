@@ -8,10 +8,14 @@
 
 from microbit import sleep, i2c, display, button_b
 from ustruct import unpack as unp
-from utime import ticks_diff, ticks_ms, sleep_ms
+from utime import ticks_diff, ticks_ms, ticks_us, sleep_ms
+from array import array
 
 _DEFAULT_ADDRESS         = 0x77
 
+MODE_FORCED              = 1 # One conversion per reading
+MODE_NORMAL              = 3 # Continuous conversions, separated by the standby time
+
 _BMP280_REG_DIG_T1       = 0x88
 _BMP280_REG_DIG_T2       = 0x8A
 _BMP280_REG_DIG_T3       = 0x8C
@@ -27,43 +31,123 @@ _BMP280_REG_DIG_P8       = 0x9C
 _BMP280_REG_DIG_P9       = 0x9E
 
 _BMP280_REG_CHIPID       = 0xD0
+_BMP280_CHIPID           = 0x58
+
+_BMP280_CALIBRATION_SIZE = 24
+_BMP280_CALIBRATION_FILE = 'bmp280_{:02x}.cal'
 
+_BMP280_REG_STATUS       = 0xF3
 _BMP280_REG_CONTROL      = 0xF4
+_BMP280_REG_CONFIG       = 0xF5
 _BMP280_REGISTER_DATA    = 0xF7
 
-_BMP280_TEMP_OS_2        = 2
-_BMP280_PRES_OS_16       = 5
+_BMP280_STATUS_MEASURING = 0x08
+
+# Oversampling (osrs_t / osrs_p)
+_BMP280_OS_SKIP          = 0
+_BMP280_OS_1             = 1
+_BMP280_OS_2             = 2
+_BMP280_OS_4             = 3
+_BMP280_OS_8             = 4
+_BMP280_OS_16            = 5
+
+_BMP280_TEMP_OS_2        = _BMP280_OS_2
+_BMP280_PRES_OS_16       = _BMP280_OS_16
+
+# IIR filter coefficient
+_BMP280_FILTER_OFF       = 0
+_BMP280_FILTER_2         = 1
+_BMP280_FILTER_4         = 2
+_BMP280_FILTER_8         = 3
+_BMP280_FILTER_16        = 4
+
+# Normal mode standby time (t_sb)
+_BMP280_STANDBY_0_5      = 0 # 0.5 ms
+_BMP280_STANDBY_62_5     = 1 # 62.5 ms
+_BMP280_STANDBY_125      = 2 # 125 ms
+_BMP280_STANDBY_250      = 3 # 250 ms
+_BMP280_STANDBY_500      = 4 # 500 ms
+_BMP280_STANDBY_1000     = 5 # 1000 ms
+_BMP280_STANDBY_2000     = 6 # 2000 ms
+_BMP280_STANDBY_4000     = 7 # 4000 ms
+
+# Pressure to altitude lookup table, covering the sensor's 300..1100 hPa range
+_ALTITUDE_TABLE_MIN      = 30000 # Pa
+_ALTITUDE_TABLE_STEP     = 1000  # Pa
+_ALTITUDE_TABLE_SIZE     = 81
+
+def _altitude(pressure, sea_level_pressure):
+    # International barometric formula, pressures in Pa, result in cm
+    return (1 - pow(pressure / sea_level_pressure, 1 / 5.25588)) / 0.0000225577 * 100
+
+class BarometerSample:
+    # Raw readings from one conversion, derived values are compensated on first use
+    def __init__(self, sensor, timestamp, temperature_raw, pressure_raw):
+        self._sensor = sensor
+        self._timestamp = timestamp
+        self._temperature_raw = temperature_raw
+        self._pressure_raw = pressure_raw
+        
+        self._temperature_fine = None
+        self._temperature = None
+        self._pascals = None
+        self._pressure = None
+        self._altitude = None
+    
+    @property
+    def timestamp(self):
+        return self._timestamp
+    
+    def _fine(self):
+        if self._temperature_fine is None:
+            self._temperature_fine = self._sensor._compensate_temperature(self._temperature_raw)
+        return self._temperature_fine
+    
+    def temperature(self):
+        # Celsius
+        if self._temperature is None:
+            self._temperature = ((self._fine() * 5 + 128) >> 8) / 100.
+        return self._temperature
+    
+    def _pa(self):
+        # Compensated Pa, an int on the integer path so altitude never goes through float
+        if self._pascals is None:
+            self._pascals = self._sensor._compensate_pressure(self._fine(), self._pressure_raw)
+        return self._pascals
+    
+    def pressure(self):
+        # hPa
+        if self._pressure is None:
+            self._pressure = self._pa() / 100
+        return self._pressure
+    
+    def altitude(self):
+        # cm
+        if self._altitude is None:
+            self._altitude = self._sensor._lookup_altitude(int(self._pa()))
+        return self._altitude
 
 class GroveBarometerSensor:
-    def __init__(self):
+    def __init__(self, cache_calibration = False, mode = MODE_FORCED, temperature_oversampling = _BMP280_TEMP_OS_2,
+                 pressure_oversampling = _BMP280_PRES_OS_16, filter = _BMP280_FILTER_OFF, standby = _BMP280_STANDBY_0_5,
+                 integer = False, sea_level_pressure = 1013.25, max_age_ms = 150):
         self._device_address = _DEFAULT_ADDRESS
 
-        assert self._read_register(_BMP280_REG_CHIPID, 1)[0] == 0x58, 'BMP280_REG_CHIPID is not equal to 0x58'
+        chip_id = self._read_register(_BMP280_REG_CHIPID, 1)[0]
+        assert chip_id == _BMP280_CHIPID, 'BMP280_REG_CHIPID is not equal to 0x58'
         
-        self._last_read = 0
+        self._sample = None
+        self._max_age_ms = max_age_ms
         
-        self._temperature_fine = 0
-        self._temperature_raw = 0
-        self._temperature = 0
- 
-        self._pressure_raw = 0
-        self._pressure = 0
+        self._integer = integer
+        self._altitude_table = None
+        self.set_sea_level_pressure(sea_level_pressure)
         
-        self._digit_t1 = unp('<H', self._read_register(_BMP280_REG_DIG_T1, 2))[0]
-        self._digit_t2 = unp('<h', self._read_register(_BMP280_REG_DIG_T2, 2))[0]
-        self._digit_t3 = unp('<h', self._read_register(_BMP280_REG_DIG_T3, 2))[0]
-   
-        self._digit_p1 = unp('<H', self._read_register(_BMP280_REG_DIG_P1, 2))[0]
-        self._digit_p2 = unp('<h', self._read_register(_BMP280_REG_DIG_P2, 2))[0]
-        self._digit_p3 = unp('<h', self._read_register(_BMP280_REG_DIG_P3, 2))[0]
-        self._digit_p4 = unp('<h', self._read_register(_BMP280_REG_DIG_P4, 2))[0]
-        self._digit_p5 = unp('<h', self._read_register(_BMP280_REG_DIG_P5, 2))[0]
-        self._digit_p6 = unp('<h', self._read_register(_BMP280_REG_DIG_P6, 2))[0]
-        self._digit_p7 = unp('<h', self._read_register(_BMP280_REG_DIG_P7, 2))[0]
-        self._digit_p8 = unp('<h', self._read_register(_BMP280_REG_DIG_P8, 2))[0]
-        self._digit_p9 = unp('<h', self._read_register(_BMP280_REG_DIG_P9, 2))[0]
+        (self._digit_t1, self._digit_t2, self._digit_t3,
+         self._digit_p1, self._digit_p2, self._digit_p3, self._digit_p4, self._digit_p5,
+         self._digit_p6, self._digit_p7, self._digit_p8, self._digit_p9) = unp('<HhhHhhhhhhhh', self._load_calibration(chip_id, cache_calibration))
    
-        self._write_register(_BMP280_REG_CONTROL, 0x3F)
+        self.configure(mode, temperature_oversampling, pressure_oversampling, filter, standby)
         
     def _write_register(self, address, data):
         i2c.write(self._device_address, bytearray([address, data]))
@@ -72,69 +156,174 @@ class GroveBarometerSensor:
         i2c.write(self._device_address, bytearray([address]))
         return i2c.read(_DEFAULT_ADDRESS, num_bytes)
 
-    def _read_all_data(self):
-        if ticks_diff(ticks_ms(), self._last_read) > 150:
-            self._last_read = ticks_ms()
-            
-            self._write_register(_BMP280_REG_CONTROL, (_BMP280_TEMP_OS_2 + (_BMP280_PRES_OS_16 << 3) + (1 << 6)))
-            sleep_ms(120)
-            
-            data = self._read_register(_BMP280_REGISTER_DATA, 6)
-            
-            self._pressure_raw = (data[0] << 12) + (data[1] << 4) + (data[2] >> 4)
-            self._temperature_raw = (data[3] << 12) + (data[4] << 4) + (data[5] >> 4)
- 
-            self._temperature_fine = 0
-            self._temperature = 0
-            self._pressure = 0
-            
-    def _calculate_temperature(self):
-        self._read_all_data()
+    def _load_calibration(self, chip_id, cache):
+        # The cache is keyed by chip ID only, so delete the file if the sensor is swapped
+        name = _BMP280_CALIBRATION_FILE.format(chip_id)
         
-        if self._temperature_fine == 0:
-            var1 = (((self._temperature_raw >> 3) - (self._digit_t1 << 1)) * self._digit_t2) >> 11
-            var2 = (((((self._temperature_raw >> 4) - self._digit_t1) * ((self._temperature_raw >> 4) - self._digit_t1)) >> 12) * self._digit_t3) >> 14
-            self._temperature_fine = var1 + var2
-            
-        if self._temperature == 0:
-            self._temperature = ((self._temperature_fine * 5 + 128) >> 8) / 100.
-            
-        return self._temperature
+        if cache:
+            try:
+                with open(name, 'rb') as file:
+                    data = file.read()
+                if len(data) == _BMP280_CALIBRATION_SIZE:
+                    return data
+            except OSError:
+                pass
+        
+        # dig_T1..dig_P9 are contiguous from 0x88, so a single burst fetches them all
+        data = self._read_register(_BMP280_REG_DIG_T1, _BMP280_CALIBRATION_SIZE)
+        
+        if cache:
+            try:
+                with open(name, 'wb') as file:
+                    file.write(data)
+            except OSError:
+                pass
         
-    def _calculate_pressure(self):
-        self._calculate_temperature()
+        return data
 
-        if self._pressure == 0:
-            var1 = self._temperature_fine - 128000
-            var2 = var1 * var1 * self._digit_p6
-            var2 = var2 + ((var1 * self._digit_p5) << 17)
-            var2 = var2 + (self._digit_p4 << 35)
-            var1 = ((var1 * var1 * self._digit_p3) >> 8) + ((var1 * self._digit_p2) << 12)
-            var1 = (((1 << 47) + var1) * self._digit_p1) >> 33
+    def configure(self, mode = MODE_FORCED, temperature_oversampling = _BMP280_TEMP_OS_2,
+                  pressure_oversampling = _BMP280_PRES_OS_16, filter = _BMP280_FILTER_OFF, standby = _BMP280_STANDBY_0_5):
+        self._mode = mode
+        self._control = (temperature_oversampling << 5) | (pressure_oversampling << 2)
+        
+        # Worst case conversion time from the datasheet, used to bound status polling
+        self._max_measure_ms = 2 + (23 * ((1 << temperature_oversampling) >> 1) + 23 * ((1 << pressure_oversampling) >> 1)) // 10
+        
+        # CONFIG is only guaranteed to be taken in sleep mode
+        self._write_register(_BMP280_REG_CONTROL, self._control)
+        self._write_register(_BMP280_REG_CONFIG, (standby << 5) | (filter << 2))
+        
+        if mode == MODE_NORMAL:
+            self._write_register(_BMP280_REG_CONTROL, self._control | MODE_NORMAL)
+        
+        self._sample = None
+
+    def _wait_for_measurement(self):
+        start = ticks_ms()
+        while self._read_register(_BMP280_REG_STATUS, 1)[0] & _BMP280_STATUS_MEASURING:
+            if ticks_diff(ticks_ms(), start) > self._max_measure_ms:
+                break
+            sleep_ms(1)
+
+    def measure(self):
+        # Returns the current snapshot, only converting again once it is older than max_age_ms
+        sample = self._sample
+        if sample is not None and ticks_diff(ticks_ms(), sample.timestamp) <= self._max_age_ms:
+            return sample
+        
+        # In normal mode the data registers always hold the latest conversion
+        if self._mode == MODE_FORCED:
+            self._write_register(_BMP280_REG_CONTROL, self._control | MODE_FORCED)
+            self._wait_for_measurement()
+        
+        data = self._read_register(_BMP280_REGISTER_DATA, 6)
+        
+        pressure_raw = (data[0] << 12) + (data[1] << 4) + (data[2] >> 4)
+        temperature_raw = (data[3] << 12) + (data[4] << 4) + (data[5] >> 4)
+        
+        self._sample = BarometerSample(self, ticks_ms(), temperature_raw, pressure_raw)
+        return self._sample
+    
+    def set_max_age(self, max_age_ms):
+        self._max_age_ms = max_age_ms
+            
+    def _compensate_temperature(self, temperature_raw):
+        # Returns t_fine
+        var1 = (((temperature_raw >> 3) - (self._digit_t1 << 1)) * self._digit_t2) >> 11
+        var2 = (((((temperature_raw >> 4) - self._digit_t1) * ((temperature_raw >> 4) - self._digit_t1)) >> 12) * self._digit_t3) >> 14
+        return var1 + var2
+        
+    def _compensate_pressure_float(self, temperature_fine, pressure_raw):
+        # 64-bit datasheet compensation, returns Pa
+        var1 = temperature_fine - 128000
+        var2 = var1 * var1 * self._digit_p6
+        var2 = var2 + ((var1 * self._digit_p5) << 17)
+        var2 = var2 + (self._digit_p4 << 35)
+        var1 = ((var1 * var1 * self._digit_p3) >> 8) + ((var1 * self._digit_p2) << 12)
+        var1 = (((1 << 47) + var1) * self._digit_p1) >> 33
  
-            if var1 == 0:
-                return 0
+        if var1 == 0:
+            return 0
  
-            p = 1048576 - self._pressure_raw
-            p = int((((p << 31) - var2) * 3125) / var1)
-            var1 = (self._digit_p9 * (p >> 13) * (p >> 13)) >> 25
-            var2 = (self._digit_p8 * p) >> 19
+        p = 1048576 - pressure_raw
+        p = int((((p << 31) - var2) * 3125) / var1)
+        var1 = (self._digit_p9 * (p >> 13) * (p >> 13)) >> 25
+        var2 = (self._digit_p8 * p) >> 19
  
-            p = ((p + var1 + var2) >> 8) + (self._digit_p7 << 4)
-            self._pressure = (p / 256.0) / 100
-            
-        return self._pressure
+        p = ((p + var1 + var2) >> 8) + (self._digit_p7 << 4)
+        return p / 256.0
+
+    def _compensate_pressure_int(self, temperature_fine, pressure_raw):
+        # 32-bit integer datasheet compensation, returns Pa
+        var1 = (temperature_fine >> 1) - 64000
+        var2 = (((var1 >> 2) * (var1 >> 2)) >> 11) * self._digit_p6
+        var2 = var2 + ((var1 * self._digit_p5) << 1)
+        var2 = (var2 >> 2) + (self._digit_p4 << 16)
+        var1 = (((self._digit_p3 * (((var1 >> 2) * (var1 >> 2)) >> 13)) >> 3) + ((self._digit_p2 * var1) >> 1)) >> 18
+        var1 = ((32768 + var1) * self._digit_p1) >> 15
+        
+        if var1 == 0:
+            return 0
+        
+        p = ((1048576 - pressure_raw) - (var2 >> 12)) * 3125
+        if p < 0x80000000:
+            p = (p << 1) // var1
+        else:
+            p = (p // var1) * 2
+        
+        var1 = (self._digit_p9 * (((p >> 3) * (p >> 3)) >> 13)) >> 12
+        var2 = ((p >> 2) * self._digit_p8) >> 13
+        
+        return p + ((var1 + var2 + self._digit_p7) >> 4)
+
+    def _compensate_pressure(self, temperature_fine, pressure_raw):
+        if self._integer:
+            return self._compensate_pressure_int(temperature_fine, pressure_raw)
+        
+        return self._compensate_pressure_float(temperature_fine, pressure_raw)
+    
+    def _lookup_altitude(self, pressure):
+        # Linear interpolation between table entries, pressure in Pa, result in cm
+        offset = pressure - _ALTITUDE_TABLE_MIN
+        index = offset // _ALTITUDE_TABLE_STEP
+        
+        if index < 0:
+            index = 0
+        elif index > _ALTITUDE_TABLE_SIZE - 2:
+            index = _ALTITUDE_TABLE_SIZE - 2
+        
+        table = self._altitude_table
+        if table is None:
+            table = self._build_altitude_table()
+        
+        low = table[index]
+        high = table[index + 1]
+        
+        return low + (high - low) * (offset - index * _ALTITUDE_TABLE_STEP) // _ALTITUDE_TABLE_STEP
+    
+    def _build_altitude_table(self):
+        # Built on the first altitude lookup rather than at construction, so a reading
+        # that never asks for altitude never pays for the 81 pow() calls
+        sea_level = self._sea_level_pressure
+        table = array('i', [0] * _ALTITUDE_TABLE_SIZE)
+        
+        for i in range(_ALTITUDE_TABLE_SIZE):
+            table[i] = int(_altitude(_ALTITUDE_TABLE_MIN + i * _ALTITUDE_TABLE_STEP, sea_level))
+        
+        self._altitude_table = table
+        return table
     
-    def _calculate_altitude(self):
-        a = self._calculate_pressure() / 101325
-        b = 1 / 5.25588
-        c = pow(a, b)
-        c = c / 0.0000225577
+    def set_sea_level_pressure(self, pressure):
+        # pressure in hPa. The table is rebuilt on the next lookup and only the current
+        # sample's altitude is dropped, its raw readings are still good
+        self._sea_level_pressure = pressure * 100
+        self._altitude_table = None
         
-        return c
+        if self._sample is not None:
+            self._sample._altitude = None
     
     def get_temperature(self, fahrenheit = False):
-        value = self._calculate_temperature()
+        value = self.measure().temperature()
         
         if fahrenheit:
             value = (value * 9/5) + 32
@@ -142,7 +331,7 @@ class GroveBarometerSensor:
         return round(value)
     
     def get_pressure(self, imperial = False):
-        value = self._calculate_pressure()
+        value = self.measure().pressure()
         
         if imperial:
             value /= 33.87
@@ -150,7 +339,7 @@ class GroveBarometerSensor:
         return round(value)
     
     def get_altitude(self, imperial = False):
-        value = self._calculate_altitude()
+        value = self.measure().altitude()
         
         if imperial:
             value /= 2.54
@@ -185,5 +374,29 @@ def demo():
         
         sleep(3000)
         
+def benchmark(iterations = 100):
+    sensor = GroveBarometerSensor()
+    sample = sensor.measure()
+    temperature_fine = sample._fine()
+    
+    for name, compensate in (('float', sensor._compensate_pressure_float), ('integer', sensor._compensate_pressure_int)):
+        start = ticks_us()
+        for _ in range(iterations):
+            value = compensate(temperature_fine, sample._pressure_raw)
+        print("{} compensation: {} Pa, {} us".format(name, value, ticks_diff(ticks_us(), start) // iterations))
+    
+    pressures = range(_ALTITUDE_TABLE_MIN, _ALTITUDE_TABLE_MIN + (_ALTITUDE_TABLE_SIZE - 1) * _ALTITUDE_TABLE_STEP, 337)
+    
+    error = 0
+    for pressure in pressures:
+        error = max(error, abs(sensor._lookup_altitude(pressure) - _altitude(pressure, sensor._sea_level_pressure)))
+    print("altitude table: max error {} cm".format(round(error)))
+    
+    for name, altitude in (('pow', lambda p: _altitude(p, sensor._sea_level_pressure)), ('table', sensor._lookup_altitude)):
+        start = ticks_us()
+        for pressure in pressures:
+            altitude(pressure)
+        print("{} altitude: {} us".format(name, ticks_diff(ticks_us(), start) // len(pressures)))
+        
 if __name__ == '__main__':
     demo()
@@ -8,123 +8,133 @@
 
 from micropython import const
 from microbit import pin0
-from utime import sleep_ms, sleep_us, ticks_ms, ticks_us, ticks_diff
+from machine import time_pulse_us
+from utime import sleep_ms, ticks_ms, ticks_diff
+from array import array
 
 DHT_11       = const(11)
 DHT_22       = const(22)
 
-_CPU_SPEED   = const(6)
-_MAX_TIMINGS = const(85)
+_BITS        = const(40)
+_PULSES      = const(41)  # Response pulse followed by one pulse per bit
+_ONE_US      = const(50)  # High pulses longer than this are 1 bits (0 ~= 27us, 1 ~= 70us)
+_TIMEOUT_US  = const(200)
 _HIGH        = const(1)
 _LOW         = const(0)
 _NAN         = 999
 
+_DHT_11_MIN_INTERVAL_MS = const(1000)
+_DHT_22_MIN_INTERVAL_MS = const(2000)
+
+def _decode(pulses, data):
+    # Thresholds captured high pulse widths into the 5 data bytes, pulses[0] is the
+    # sensor's response. Returns False on a timeout or checksum mismatch, or when no
+    # bit reads as 1: an all-zero frame passes the checksum, but it is what a capture
+    # too slow to time the 1 bits in full produces and no sensor reports 0% at 0C
+    for i in range(5):
+        data[i] = 0
+    
+    for i in range(_PULSES):
+        if pulses[i] < 0:
+            return False
+    
+    ones = 0
+    for j in range(_BITS):
+        data[j >> 3] <<= 1
+        if pulses[j + 1] > _ONE_US:
+            data[j >> 3] |= 1
+            ones += 1
+    
+    if ones == 0:
+        return False
+    
+    return data[4] == ((data[0] + data[1] + data[2] + data[3]) & 0xFF)
+
 class GroveTemperatureAndHumiditySensor:
     def __init__(self, pin, type):
         self._pin = pin
         self._data = bytearray([0, 0, 0, 0, 0])
+        self._pulses = array('i', [0] * _PULSES)
         self._type = type
-        self._last_read_time = 0
-        self._first_reading = True
+        self._min_interval = _DHT_11_MIN_INTERVAL_MS if type == DHT_11 else _DHT_22_MIN_INTERVAL_MS
+        
+        self._last_attempt = None
+        self._sample = (_NAN, _NAN, None)
         
         self._pin.write_digital(_HIGH)
         
     def _read(self):
-        last_state = _HIGH
-        counter = 0
-        current_time = None
-        j = 0
-    
-        self._pin.write_digital(_HIGH)
-        sleep_ms(250)
+        # Start signal, the DHT11 needs at least 18ms low, the DHT22 at least 1ms
+        self._pin.write_digital(_LOW)
+        sleep_ms(18 if self._type == DHT_11 else 2)
+        self._pin.read_digital()
         
-        current_time = ticks_ms()
-        if current_time < self._last_read_time:
-            self._last_read_time = 0
+        # The line idles high for 20-40us after release before the sensor answers. Timing
+        # its 80us low response first syncs the capture on the response whatever the
+        # interpreter's speed, a high pulse timed straight away would catch the idle
+        pulses = self._pulses
+        pin = self._pin
+        pulse = time_pulse_us
+        if pulse(pin, _LOW, _TIMEOUT_US) < 0:
+            self._pin.write_digital(_HIGH)
+            return False
         
-        if not self._first_reading and ticks_diff(current_time, self._last_read_time) < 2000:
-            return True
+        # time_pulse_us waits for each rising edge itself, so the loop only has to keep
+        # up with the 50us low gap between bits; widths are thresholded afterwards
+        for i in range(_PULSES):
+            pulses[i] = pulse(pin, _HIGH, _TIMEOUT_US)
         
-        self._first_reading = False
-        self._last_read_time = ticks_ms()
+        self._pin.write_digital(_HIGH)
+        return _decode(pulses, self._data)
+    
+    def _convert(self):
+        data = self._data
         
-        print("self._data = {}".format(str(self._data)))
+        if self._type == DHT_11:
+            return float(data[2]), float(data[0])
         
-        self._data[0] = self._data[1] = self._data[2] = self._data[3] = self._data[4] = 0
+        temperature = ((data[2] & 0x7F) * 256 + data[3]) / 10
+        if data[2] & 0x80:
+            temperature = -temperature
         
-        self._pin.write_digital(_LOW)
-        sleep_ms(20)
-        self._pin.write_digital(_HIGH)
-        sleep_ms(40)
+        return temperature, (data[0] * 256 + data[1]) / 10
+    
+    def measure(self):
+        # Returns (temperature, humidity, timestamp, fresh). Inside the sensor's minimum
+        # interval, or if the transfer fails, the last good values are served with
+        # fresh set to False; the timestamp is None until a read has succeeded
+        now = ticks_ms()
         
-        for i in range(_MAX_TIMINGS):
-            counter = 0
-            
-            while self._pin.read_digital() == last_state:
-                counter += 1
-                sleep_us(1)
-                if counter == 255:
-                    break
-                
-            last_state = self._pin.read_digital()
-            if counter == 255:
-                break
+        if self._last_attempt is None or ticks_diff(now, self._last_attempt) >= self._min_interval:
+            self._last_attempt = now
             
-            if i >= 4 and i % 2 == 0:
-                self._data[j / 8] <<= 1
-                if counter > _CPU_SPEED:
-                    self._data[j / 8] |= 1
-                j += 1
+            if self._read():
+                temperature, humidity = self._convert()
+                self._sample = (temperature, humidity, now)
+                return temperature, humidity, now, True
         
-        if j >= 40 and (self._data[4] == ((self._data[0] + self._data[1] + self._data[2] + self._data[3]) & 0xFF)):
-            return True
-        
-        return False
+        return self._sample[0], self._sample[1], self._sample[2], False
     
     def get_temperature(self):
-        if self._read():
-            if self._type == DHT_11:
-                value = float(self._data[2])
-                return value
-            
-            if self._type == DHT_22:
-                value = float(self._data[2] & 0x7F)
-                value *= 256
-                value += self._data[3]
-                value /= 10
-                
-                if self._data[2] & 0x80:
-                    value *= -1
-                    
-                return value
-            
-        return _NAN
+        return self.measure()[0]
 
     def get_temperature_faherheit(self):
         value = self.get_temperature()
+        
+        if value == _NAN:
+            return value
+        
+        return (value * 9/5) + 32
     
     def get_humidity(self):
-        if self._read():
-            if self._type == DHT_11:
-                return float(self._data[0])
-
-            if self._type == DHT_22:
-                value = float(self._data[0])
-                value *= 256
-                value += self._data[1]
-                value /= 10
-
-                return value
-            
-        return NAN
+        return self.measure()[1]
     
 def demo():
     sensor = GroveTemperatureAndHumiditySensor(pin0, DHT_22)
 
-    temp = sensor.get_temperature()
-    hum = sensor.get_humidity()
+    temp, hum, timestamp, fresh = sensor.measure()
     
-    print("Current Temperature: {}, Humidity: {}".format(str(temp), str(hum)))
+    print("Current Temperature: {}, Humidity: {}, Fresh: {}".format(str(temp), str(hum), str(fresh)))
     
 if __name__ == '__main__':
     demo()
\ No newline at end of file
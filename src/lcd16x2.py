@@ -10,7 +10,7 @@
 # source
 
 from microbit import i2c, sleep, display, button_b
-from utime import sleep_us
+from utime import sleep_us, ticks_us, ticks_add, ticks_diff
 
 _DEFAULT_ADDRESS    = 0x3E
 
@@ -46,10 +46,40 @@ _LCD_ENTRYLEFT       = 0x02
 _LCD_ENTRYSHIFTINCREMENT = 0x01
 _LCD_ENTRYSHIFTDECREMENT  = 0x00
 
+# I2C control bytes, Co (0x80) set means another control byte follows the next byte
+_LCD_CONTROL_COMMAND = 0x80
+_LCD_CONTROL_DATA    = 0x40 # Co clear, every following byte is character data
+
+_LCD_COLUMNS         = 16
+_LCD_ROWS            = 2
+_LCD_ROW_OFFSETS     = (0x00, 0x40)
+_LCD_ROW_LENGTH      = 40   # DDRAM per row, the columns past 16 are off-screen
+_LCD_MERGE_GAP       = 3    # Unchanged characters cheaper to resend than a new address
+
+_LCD_CGRAM_SLOTS     = 8    # User-defined characters 0-7
+_LCD_GLYPH_ROWS      = 8
+
+# Controller execution times, rounded up from the datasheet
+_LCD_CLEAR_US        = 2000 # Clear display and return home
+_LCD_COMMAND_US      = 40   # All other commands and character writes
+
 class Lcd16x2():
     def __init__(self):
         self._device_address = _DEFAULT_ADDRESS
         
+        # _shadow holds what callers have drawn, _glass what the controller is showing
+        self._shadow = bytearray(b' ' * (_LCD_COLUMNS * _LCD_ROWS))
+        self._glass = bytearray(b' ' * (_LCD_COLUMNS * _LCD_ROWS))
+        self._address = 0 # Mirrors the controller's DDRAM address counter
+        self._ready_at = ticks_us()
+        
+        # Glyph bitmaps by name, the name resident in each CGRAM slot and when each slot
+        # was last used, for least-recently-used eviction
+        self._glyphs = {}
+        self._slots = [None] * _LCD_CGRAM_SLOTS
+        self._slot_used = [0] * _LCD_CGRAM_SLOTS
+        self._glyph_clock = 0
+        
         self._display_function = _LCD_DISPLAYON | _LCD_2LINE
         sleep_us(50000)
         
@@ -67,26 +97,162 @@ class Lcd16x2():
         self._display_mode = _LCD_ENTRYLEFT | _LCD_ENTRYSHIFTDECREMENT
         self.command(_LCD_ENTRYMODESET | self._display_mode)
 
-    def _write_register(self, address, data):
-        i2c.write(self._device_address, bytearray([address, data]))
+    def _wait_ready(self):
+        # Only waits for whatever is left of the last command's execution time
+        remaining = ticks_diff(self._ready_at, ticks_us())
+        if remaining > 0:
+            sleep_us(remaining)
+
+    def _send(self, data, execution_us = _LCD_COMMAND_US):
+        self._wait_ready()
+        i2c.write(self._device_address, data)
+        self._ready_at = ticks_add(ticks_us(), execution_us)
 
-    def command(self, value):
+    def _write_register(self, address, data, execution_us = _LCD_COMMAND_US):
+        self._send(bytearray([address, data]), execution_us)
+
+    def _left_to_right(self):
+        return self._display_mode & _LCD_ENTRYLEFT
+
+    def _advance(self, count):
+        # The address counter runs 0x00-0x27 then 0x40-0x67 and wraps back to 0x00, count
+        # is negative when it steps down in right to left entry mode
+        position = (self._address >> 6) * _LCD_ROW_LENGTH + (self._address & 0x3F) + count
+        position %= _LCD_ROWS * _LCD_ROW_LENGTH
+        self._address = _LCD_ROW_OFFSETS[position // _LCD_ROW_LENGTH] + position % _LCD_ROW_LENGTH
+
+    def busy(self):
+        return ticks_diff(self._ready_at, ticks_us()) > 0
+
+    def command(self, value, execution_us = _LCD_COMMAND_US):
         assert value >= 0 and value < 256
-        self._write_register(_LCD_SETDDRAMADDR, value)
+        self._write_register(_LCD_SETDDRAMADDR, value, execution_us)
 
     def write_character(self, value):
         assert value >= 0 and value < 256
         self._write_register(_LCD_SETCGRAMADDR, value)
 
     def write(self, value):
-        value = str(value)
-        for char in value:
-            self.write_character(ord(char))
-            sleep_us(200)
+        # The whole string goes in one data-mode transaction, each byte taking longer on
+        # the bus than the controller needs to latch it
+        data = str(value).encode()
+        self._send(bytes([_LCD_CONTROL_DATA]) + data)
+        
+        if not self._left_to_right():
+            # The counter steps down after each character, rare enough to follow one
+            # character at a time
+            for i in range(len(data)):
+                column = self._address & 0x3F
+                if column < _LCD_COLUMNS:
+                    cell = (self._address >> 6) * _LCD_COLUMNS + column
+                    self._glass[cell] = data[i]
+                    self._shadow[cell] = data[i]
+                self._advance(-1)
+            return
+        
+        # Only characters landing on visible columns are recorded; the rest of a row
+        # goes to off-screen DDRAM until the counter wraps to the other row
+        index = 0
+        while index < len(data):
+            row = self._address >> 6
+            column = self._address & 0x3F
+            count = min(len(data) - index, _LCD_ROW_LENGTH - column)
+            
+            if column < _LCD_COLUMNS:
+                start = row * _LCD_COLUMNS + column
+                visible = min(count, _LCD_COLUMNS - column)
+                self._glass[start:start + visible] = data[index:index + visible]
+                self._shadow[start:start + visible] = data[index:index + visible]
+            
+            self._advance(count)
+            index += count
 
     def set_cursor(self, col, row):
-        col = (col | 0x80) if row == 0 else (col | 0xc0)
-        self.command(col)
+        self._address = _LCD_ROW_OFFSETS[row] + col
+        self.command(_LCD_SETDDRAMADDR | self._address)
+
+    def text(self, col, row, value):
+        # Draws into the shadow buffer only, clipped to the row; call flush() to show it
+        assert col >= 0 and col < _LCD_COLUMNS
+        assert row >= 0 and row < _LCD_ROWS
+        data = str(value).encode()
+        start = row * _LCD_COLUMNS + col
+        end = min(start + len(data), (row + 1) * _LCD_COLUMNS)
+        self._shadow[start:end] = data[:end - start]
+
+    def flush(self):
+        # Sends each run of changed characters as a single transaction: the DDRAM address
+        # command followed by the characters in data mode. Right to left, a run is sent
+        # reversed from its last cell
+        shadow = self._shadow
+        glass = self._glass
+        left_to_right = self._left_to_right()
+        
+        for row in range(_LCD_ROWS):
+            index = row * _LCD_COLUMNS
+            row_end = index + _LCD_COLUMNS
+            
+            while index < row_end:
+                if shadow[index] == glass[index]:
+                    index += 1
+                    continue
+                
+                start = index
+                end = index + 1
+                index += 1
+                while index < row_end and index - end < _LCD_MERGE_GAP:
+                    if shadow[index] != glass[index]:
+                        end = index + 1
+                    index += 1
+                
+                address = _LCD_ROW_OFFSETS[row] + start - row * _LCD_COLUMNS
+                data = shadow[start:end]
+                if not left_to_right:
+                    address += end - start - 1
+                    data = bytes(reversed(data))
+                
+                self._send(bytes([_LCD_CONTROL_COMMAND, _LCD_SETDDRAMADDR | address, _LCD_CONTROL_DATA]) + data)
+                
+                glass[start:end] = shadow[start:end]
+                self._address = address
+                self._advance(end - start if left_to_right else start - end)
+
+    def _upload_glyph(self, slot, bitmap):
+        # CGRAM addresses step the same way as DDRAM, so right to left the rows go in
+        # reversed from the slot's last row
+        address = _LCD_SETCGRAMADDR | (slot << 3)
+        if not self._left_to_right():
+            address += _LCD_GLYPH_ROWS - 1
+            bitmap = bytes(reversed(bitmap))
+        self._send(bytes([_LCD_CONTROL_COMMAND, address, _LCD_CONTROL_DATA]) + bitmap)
+        
+        # The address counter now points into CGRAM, so put it back where DDRAM writes
+        # left it, which may be an off-screen column
+        self.command(_LCD_SETDDRAMADDR | self._address)
+
+    def define_glyph(self, name, bitmap):
+        # bitmap is 8 rows of 5 pixels, the low 5 bits of each byte
+        assert len(bitmap) == _LCD_GLYPH_ROWS
+        bitmap = bytes(bitmap)
+        self._glyphs[name] = bitmap
+        
+        if name in self._slots:
+            self._upload_glyph(self._slots.index(name), bitmap)
+
+    def glyph(self, name):
+        # Returns the character for a defined glyph, uploading it over the least recently
+        # used slot if it is not resident. Text already showing an evicted slot changes too
+        if name in self._slots:
+            slot = self._slots.index(name)
+        else:
+            slot = self._slot_used.index(min(self._slot_used))
+            self._upload_glyph(slot, self._glyphs[name])
+            self._slots[slot] = name
+        
+        self._glyph_clock += 1
+        self._slot_used[slot] = self._glyph_clock
+        
+        return chr(slot)
 
     def display(self, state):
         if state:
@@ -97,12 +263,15 @@ class Lcd16x2():
             self.command(0x08  | self._display_control)
 
     def clear(self):
-        self.command(_LCD_CLEARDISPLAY)
-        sleep_us(2000)
+        self.command(_LCD_CLEARDISPLAY, _LCD_CLEAR_US)
+        
+        self._glass[:] = b' ' * len(self._glass)
+        self._shadow[:] = self._glass
+        self._address = 0
 
     def home(self):
-        self.command(_LCD_CLEARDISPLAY)
-        sleep_us(2000)
+        self.command(_LCD_RETURNHOME, _LCD_CLEAR_US)
+        self._address = 0
         
     def autoscroll(self):
         self._display_mode |= _LCD_ENTRYSHIFTINCREMENT
@@ -119,7 +288,6 @@ class Lcd16x2():
     def no_blink(self):
         self._display_control &= ~_LCD_BLINKON
         self.command(_LCD_DISPLAYCONTROL | self._display_control);
-        sleep_us(2000)
        
     def cursor(self):
         self._display_control |= _LCD_CURSORON
@@ -128,15 +296,12 @@ class Lcd16x2():
     def no_cursor(self):
         self._display_control &= ~_LCD_CURSORON
         self.command(_LCD_DISPLAYCONTROL | self._display_control);
-        sleep_us(2000)
        
     def scroll_display_left(self):
         self.command(_LCD_CURSORSHIFT | _LCD_DISPLAYMOVE | _LCD_MOVELEFT);
-        sleep_us(2000)
       
     def scroll_display_right(self):
         self.command(_LCD_CURSORSHIFT | _LCD_DISPLAYMOVE | _LCD_MOVERIGHT);
-        sleep_us(2000)
         
     def left_to_right(self):
         self._display_mode |= _LCD_ENTRYLEFT;
@@ -160,10 +325,9 @@ def main():
         board.clear()
         board.write('Hello World')
         
-        board.set_cursor(0, 1)
         for i in range(20):
-            board.set_cursor(0, 1)
-            board.write(str(i))
+            board.text(0, 1, str(i))
+            board.flush()
             sleep(500)
             
         sleep(1000)
@@ -7,6 +7,7 @@
 # ------------------------------------------------------------------------------------------
 
 from microbit import i2c, sleep, Image
+from oled_framebuffer import FrameBuffer
 
 _DEFAULT_ADDRESS = 0x3C
 
@@ -31,11 +32,36 @@ _INIT_COMMANDS = [
         [0xd6, 1],
         [0xaf]]
 
-class OledSSD1306:
+_GLYPH_WIDTH = 10 # 5 font columns, each doubled
+_WIDTH       = 128
+_HEIGHT      = 32  # 4 pages, doubled vertically by the zoom setting
+
+# Column bitmaps by character, built from the micro:bit font the first time each is used
+_glyphs = {}
+
+def _glyph(char):
+    glyph = _glyphs.get(char)
+    
+    if glyph is None:
+        image = Image(char)
+        glyph = bytearray(_GLYPH_WIDTH)
+        
+        for c in range(0, 5):
+            col = 0
+            for r in range(0, 5):
+                if image.get_pixel(c, r) != 0:
+                    col |= 1 << (r + 1)
+            glyph[c * 2] = glyph[c * 2 + 1] = col
+        
+        glyph = bytes(glyph)
+        _glyphs[char] = glyph
+    
+    return glyph
+
+class OledSSD1306(FrameBuffer):
     def __init__(self):
         self._device_address = _DEFAULT_ADDRESS
-        self._buffer = bytearray(513)
-        self._buffer[0] = 0x40
+        self._init_framebuffer(_WIDTH, _HEIGHT)
         self._zoom = 1
  
         for cmd in _INIT_COMMANDS:
@@ -46,13 +72,6 @@ class OledSSD1306:
     def _write_registery(self, value):
         i2c.write(self._device_address, b'\x00' + bytearray(value))
 
-    def _set_position(self, column = 0, page = 0):
-        self._write_registery([0xB0 | page]) 
-
-        c1, c2 = column * 2 & 0x0F, column >> 3
-        self._write_registery([0x00 | c1])
-        self._write_registery([0x10 | c2])
-        
     def _set_zoom(self, value):
         if self._zoom != value:
             self._write_registery([0xD6, value])
@@ -60,16 +79,13 @@ class OledSSD1306:
             
             self._zoom = value
      
-    def _write_buffer(self):
+    def show(self):
         self._set_zoom(1)
-        self._set_position()
-        i2c.write(self._device_address, self._buffer)
+        FrameBuffer.show(self)
         
     def clear(self): 
-        self._set_position()
-        for i in range(1, 513):
-            self._buffer[i] = 0
-        self._write_buffer()
+        self.fill(0)
+        self.show()
    
     def blink(self, time = 1000):
         for c in ([0xae], [0xaf]):
@@ -87,20 +103,24 @@ class OledSSD1306:
                 
         self._write_registery([0x81, 0xcf])
 
+    def _render_row(self, buffer, index, value):
+        for i in range(0, min(len(value), 12)):
+            buffer[index:index + _GLYPH_WIDTH] = _glyph(value[i])
+            index += _GLYPH_WIDTH
+
     def string(self, x, y, value, draw=1):
-        for i in range(0, min(len(value), 12 - x)):
-            for c in range(0, 5):
-                col = 0
-                for r in range(1, 6):
-                    p = Image(value[i]).get_pixel(c, r - 1)
-                    col = col | (1 << r) if (p != 0) else col
-                ind = x * 10 + y * 128 + i * 10 + c * 2 + 1
-                self._buffer[ind], self._buffer[ind + 1] = col, col  
+        count = min(len(value), 12 - x)
+        start = x * 10 + y * 128 + 1
+        
+        for i in range(0, count):
+            ind = start + i * _GLYPH_WIDTH
+            self._buffer[ind:ind + _GLYPH_WIDTH] = _glyph(value[i])
+            
+        if count > 0:
+            self._mark_dirty(y, x * 10, x * 10 + count * _GLYPH_WIDTH)
+            
         if draw == 1:
-            self._set_zoom(1)
-            self._set_position((x) * 5, (y))
-            ind0 = x * 10 + y * 128 + 1 
-            i2c.write(self._device_address, b'\x40' + self._buffer[ind0:ind + 1]) 
+            self.show()
       
 def main():   
     i2c.init()
@@ -108,7 +128,16 @@ def main():
     
     display.string(4, 1, "Hello")
     display.string(4, 2, "World")
+    display.rect(0, 0, _WIDTH, _HEIGHT)
+    display.show()
     display.pulse()
+    
+    console = display.console()
+    for i in range(10):
+        console.append("Line {}".format(i))
+        sleep(500)
+    console.close()
+    display.clear()
 
 if __name__ == '__main__':
     main()
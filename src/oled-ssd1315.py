@@ -7,6 +7,7 @@
 # ------------------------------------------------------------------------------------------
 
 from microbit import i2c, sleep
+from oled_framebuffer import FrameBuffer
 
 _DEFAULT_ADDRESS = 0x3C
 
@@ -22,102 +23,113 @@ _INVERSE_DISPLAY = 0xA7
 
 _HORIZONTAL      = 0x00
 
-_FONT            = [[0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x00, 0x5F, 0x00, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x00, 0x07, 0x00, 0x07, 0x00, 0x00, 0x00],
-                    [0x00, 0x14, 0x7F, 0x14, 0x7F, 0x14, 0x00, 0x00],
-                    [0x00, 0x24, 0x2A, 0x7F, 0x2A, 0x12, 0x00, 0x00],
-                    [0x00, 0x23, 0x13, 0x08, 0x64, 0x62, 0x00, 0x00],
-                    [0x00, 0x36, 0x49, 0x55, 0x22, 0x50, 0x00, 0x00],
-                    [0x00, 0x00, 0x05, 0x03, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x1C, 0x22, 0x41, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x41, 0x22, 0x1C, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x08, 0x2A, 0x1C, 0x2A, 0x08, 0x00, 0x00],
-                    [0x00, 0x08, 0x08, 0x3E, 0x08, 0x08, 0x00, 0x00],
-                    [0x00, 0xA0, 0x60, 0x00, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x08, 0x08, 0x08, 0x08, 0x08, 0x00, 0x00],
-                    [0x00, 0x60, 0x60, 0x00, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x20, 0x10, 0x08, 0x04, 0x02, 0x00, 0x00],
-                    [0x00, 0x3E, 0x51, 0x49, 0x45, 0x3E, 0x00, 0x00],
-                    [0x00, 0x00, 0x42, 0x7F, 0x40, 0x00, 0x00, 0x00],
-                    [0x00, 0x62, 0x51, 0x49, 0x49, 0x46, 0x00, 0x00],
-                    [0x00, 0x22, 0x41, 0x49, 0x49, 0x36, 0x00, 0x00],
-                    [0x00, 0x18, 0x14, 0x12, 0x7F, 0x10, 0x00, 0x00],
-                    [0x00, 0x27, 0x45, 0x45, 0x45, 0x39, 0x00, 0x00],
-                    [0x00, 0x3C, 0x4A, 0x49, 0x49, 0x30, 0x00, 0x00],
-                    [0x00, 0x01, 0x71, 0x09, 0x05, 0x03, 0x00, 0x00],
-                    [0x00, 0x36, 0x49, 0x49, 0x49, 0x36, 0x00, 0x00],
-                    [0x00, 0x06, 0x49, 0x49, 0x29, 0x1E, 0x00, 0x00],
-                    [0x00, 0x00, 0x36, 0x36, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x00, 0xAC, 0x6C, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x08, 0x14, 0x22, 0x41, 0x00, 0x00, 0x00],
-                    [0x00, 0x14, 0x14, 0x14, 0x14, 0x14, 0x00, 0x00],
-                    [0x00, 0x41, 0x22, 0x14, 0x08, 0x00, 0x00, 0x00],
-                    [0x00, 0x02, 0x01, 0x51, 0x09, 0x06, 0x00, 0x00],
-                    [0x00, 0x32, 0x49, 0x79, 0x41, 0x3E, 0x00, 0x00],
-                    [0x00, 0x7E, 0x09, 0x09, 0x09, 0x7E, 0x00, 0x00],
-                    [0x00, 0x7F, 0x49, 0x49, 0x49, 0x36, 0x00, 0x00],
-                    [0x00, 0x3E, 0x41, 0x41, 0x41, 0x22, 0x00, 0x00],
-                    [0x00, 0x7F, 0x41, 0x41, 0x22, 0x1C, 0x00, 0x00],
-                    [0x00, 0x7F, 0x49, 0x49, 0x49, 0x41, 0x00, 0x00],
-                    [0x00, 0x7F, 0x09, 0x09, 0x09, 0x01, 0x00, 0x00],
-                    [0x00, 0x3E, 0x41, 0x41, 0x51, 0x72, 0x00, 0x00],
-                    [0x00, 0x7F, 0x08, 0x08, 0x08, 0x7F, 0x00, 0x00],
-                    [0x00, 0x41, 0x7F, 0x41, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x20, 0x40, 0x41, 0x3F, 0x01, 0x00, 0x00],
-                    [0x00, 0x7F, 0x08, 0x14, 0x22, 0x41, 0x00, 0x00],
-                    [0x00, 0x7F, 0x40, 0x40, 0x40, 0x40, 0x00, 0x00],
-                    [0x00, 0x7F, 0x02, 0x0C, 0x02, 0x7F, 0x00, 0x00],
-                    [0x00, 0x7F, 0x04, 0x08, 0x10, 0x7F, 0x00, 0x00],
-                    [0x00, 0x3E, 0x41, 0x41, 0x41, 0x3E, 0x00, 0x00],
-                    [0x00, 0x7F, 0x09, 0x09, 0x09, 0x06, 0x00, 0x00],
-                    [0x00, 0x3E, 0x41, 0x51, 0x21, 0x5E, 0x00, 0x00],
-                    [0x00, 0x7F, 0x09, 0x19, 0x29, 0x46, 0x00, 0x00],
-                    [0x00, 0x26, 0x49, 0x49, 0x49, 0x32, 0x00, 0x00],
-                    [0x00, 0x01, 0x01, 0x7F, 0x01, 0x01, 0x00, 0x00],
-                    [0x00, 0x3F, 0x40, 0x40, 0x40, 0x3F, 0x00, 0x00],
-                    [0x00, 0x1F, 0x20, 0x40, 0x20, 0x1F, 0x00, 0x00],
-                    [0x00, 0x3F, 0x40, 0x38, 0x40, 0x3F, 0x00, 0x00],
-                    [0x00, 0x63, 0x14, 0x08, 0x14, 0x63, 0x00, 0x00],
-                    [0x00, 0x03, 0x04, 0x78, 0x04, 0x03, 0x00, 0x00],
-                    [0x00, 0x61, 0x51, 0x49, 0x45, 0x43, 0x00, 0x00],
-                    [0x00, 0x7F, 0x41, 0x41, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x02, 0x04, 0x08, 0x10, 0x20, 0x00, 0x00],
-                    [0x00, 0x41, 0x41, 0x7F, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x04, 0x02, 0x01, 0x02, 0x04, 0x00, 0x00],
-                    [0x00, 0x80, 0x80, 0x80, 0x80, 0x80, 0x00, 0x00],
-                    [0x00, 0x01, 0x02, 0x04, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x20, 0x54, 0x54, 0x54, 0x78, 0x00, 0x00],
-                    [0x00, 0x7F, 0x48, 0x44, 0x44, 0x38, 0x00, 0x00],
-                    [0x00, 0x38, 0x44, 0x44, 0x28, 0x00, 0x00, 0x00],
-                    [0x00, 0x38, 0x44, 0x44, 0x48, 0x7F, 0x00, 0x00],
-                    [0x00, 0x38, 0x54, 0x54, 0x54, 0x18, 0x00, 0x00],
-                    [0x00, 0x08, 0x7E, 0x09, 0x02, 0x00, 0x00, 0x00],
-                    [0x00, 0x18, 0xA4, 0xA4, 0xA4, 0x7C, 0x00, 0x00],
-                    [0x00, 0x7F, 0x08, 0x04, 0x04, 0x78, 0x00, 0x00],
-                    [0x00, 0x00, 0x7D, 0x00, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x80, 0x84, 0x7D, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x7F, 0x10, 0x28, 0x44, 0x00, 0x00, 0x00],
-                    [0x00, 0x41, 0x7F, 0x40, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x7C, 0x04, 0x18, 0x04, 0x78, 0x00, 0x00],
-                    [0x00, 0x7C, 0x08, 0x04, 0x7C, 0x00, 0x00, 0x00],
-                    [0x00, 0x38, 0x44, 0x44, 0x38, 0x00, 0x00, 0x00],
-                    [0x00, 0xFC, 0x24, 0x24, 0x18, 0x00, 0x00, 0x00],
-                    [0x00, 0x18, 0x24, 0x24, 0xFC, 0x00, 0x00, 0x00],
-                    [0x00, 0x00, 0x7C, 0x08, 0x04, 0x00, 0x00, 0x00],
-                    [0x00, 0x48, 0x54, 0x54, 0x24, 0x00, 0x00, 0x00],
-                    [0x00, 0x04, 0x7F, 0x44, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x3C, 0x40, 0x40, 0x7C, 0x00, 0x00, 0x00],
-                    [0x00, 0x1C, 0x20, 0x40, 0x20, 0x1C, 0x00, 0x00],
-                    [0x00, 0x3C, 0x40, 0x30, 0x40, 0x3C, 0x00, 0x00],
-                    [0x00, 0x44, 0x28, 0x10, 0x28, 0x44, 0x00, 0x00],
-                    [0x00, 0x1C, 0xA0, 0xA0, 0x7C, 0x00, 0x00, 0x00],
-                    [0x00, 0x44, 0x64, 0x54, 0x4C, 0x44, 0x00, 0x00],
-                    [0x00, 0x08, 0x36, 0x41, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x00, 0x7F, 0x00, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x41, 0x36, 0x08, 0x00, 0x00, 0x00, 0x00],
-                    [0x00, 0x02, 0x01, 0x01, 0x02, 0x01, 0x00, 0x00],
-                    [0x00, 0x02, 0x05, 0x05, 0x02, 0x00, 0x00, 0x00]]
+_WIDTH           = 128
+_HEIGHT          = 64
+_GLYPH_SIZE      = 8 # Bytes per glyph in _FONT, the compact 6 pixel font drops the last 2
+
+# 8 columns per glyph for ASCII 32-127, glyph n starts at (n - 32) * 8
+_FONT            = (b'\x00\x00\x00\x00\x00\x00\x00\x00'
+                    b'\x00\x00\x5f\x00\x00\x00\x00\x00'
+                    b'\x00\x00\x07\x00\x07\x00\x00\x00'
+                    b'\x00\x14\x7f\x14\x7f\x14\x00\x00'
+                    b'\x00\x24\x2a\x7f\x2a\x12\x00\x00'
+                    b'\x00\x23\x13\x08\x64\x62\x00\x00'
+                    b'\x00\x36\x49\x55\x22\x50\x00\x00'
+                    b'\x00\x00\x05\x03\x00\x00\x00\x00'
+                    b'\x00\x1c\x22\x41\x00\x00\x00\x00'
+                    b'\x00\x41\x22\x1c\x00\x00\x00\x00'
+                    b'\x00\x08\x2a\x1c\x2a\x08\x00\x00'
+                    b'\x00\x08\x08\x3e\x08\x08\x00\x00'
+                    b'\x00\xa0\x60\x00\x00\x00\x00\x00'
+                    b'\x00\x08\x08\x08\x08\x08\x00\x00'
+                    b'\x00\x60\x60\x00\x00\x00\x00\x00'
+                    b'\x00\x20\x10\x08\x04\x02\x00\x00'
+                    b'\x00\x3e\x51\x49\x45\x3e\x00\x00'
+                    b'\x00\x00\x42\x7f\x40\x00\x00\x00'
+                    b'\x00\x62\x51\x49\x49\x46\x00\x00'
+                    b'\x00\x22\x41\x49\x49\x36\x00\x00'
+                    b'\x00\x18\x14\x12\x7f\x10\x00\x00'
+                    b'\x00\x27\x45\x45\x45\x39\x00\x00'
+                    b'\x00\x3c\x4a\x49\x49\x30\x00\x00'
+                    b'\x00\x01\x71\x09\x05\x03\x00\x00'
+                    b'\x00\x36\x49\x49\x49\x36\x00\x00'
+                    b'\x00\x06\x49\x49\x29\x1e\x00\x00'
+                    b'\x00\x00\x36\x36\x00\x00\x00\x00'
+                    b'\x00\x00\xac\x6c\x00\x00\x00\x00'
+                    b'\x00\x08\x14\x22\x41\x00\x00\x00'
+                    b'\x00\x14\x14\x14\x14\x14\x00\x00'
+                    b'\x00\x41\x22\x14\x08\x00\x00\x00'
+                    b'\x00\x02\x01\x51\x09\x06\x00\x00'
+                    b'\x00\x32\x49\x79\x41\x3e\x00\x00'
+                    b'\x00\x7e\x09\x09\x09\x7e\x00\x00'
+                    b'\x00\x7f\x49\x49\x49\x36\x00\x00'
+                    b'\x00\x3e\x41\x41\x41\x22\x00\x00'
+                    b'\x00\x7f\x41\x41\x22\x1c\x00\x00'
+                    b'\x00\x7f\x49\x49\x49\x41\x00\x00'
+                    b'\x00\x7f\x09\x09\x09\x01\x00\x00'
+                    b'\x00\x3e\x41\x41\x51\x72\x00\x00'
+                    b'\x00\x7f\x08\x08\x08\x7f\x00\x00'
+                    b'\x00\x41\x7f\x41\x00\x00\x00\x00'
+                    b'\x00\x20\x40\x41\x3f\x01\x00\x00'
+                    b'\x00\x7f\x08\x14\x22\x41\x00\x00'
+                    b'\x00\x7f\x40\x40\x40\x40\x00\x00'
+                    b'\x00\x7f\x02\x0c\x02\x7f\x00\x00'
+                    b'\x00\x7f\x04\x08\x10\x7f\x00\x00'
+                    b'\x00\x3e\x41\x41\x41\x3e\x00\x00'
+                    b'\x00\x7f\x09\x09\x09\x06\x00\x00'
+                    b'\x00\x3e\x41\x51\x21\x5e\x00\x00'
+                    b'\x00\x7f\x09\x19\x29\x46\x00\x00'
+                    b'\x00\x26\x49\x49\x49\x32\x00\x00'
+                    b'\x00\x01\x01\x7f\x01\x01\x00\x00'
+                    b'\x00\x3f\x40\x40\x40\x3f\x00\x00'
+                    b'\x00\x1f\x20\x40\x20\x1f\x00\x00'
+                    b'\x00\x3f\x40\x38\x40\x3f\x00\x00'
+                    b'\x00\x63\x14\x08\x14\x63\x00\x00'
+                    b'\x00\x03\x04\x78\x04\x03\x00\x00'
+                    b'\x00\x61\x51\x49\x45\x43\x00\x00'
+                    b'\x00\x7f\x41\x41\x00\x00\x00\x00'
+                    b'\x00\x02\x04\x08\x10\x20\x00\x00'
+                    b'\x00\x41\x41\x7f\x00\x00\x00\x00'
+                    b'\x00\x04\x02\x01\x02\x04\x00\x00'
+                    b'\x00\x80\x80\x80\x80\x80\x00\x00'
+                    b'\x00\x01\x02\x04\x00\x00\x00\x00'
+                    b'\x00\x20\x54\x54\x54\x78\x00\x00'
+                    b'\x00\x7f\x48\x44\x44\x38\x00\x00'
+                    b'\x00\x38\x44\x44\x28\x00\x00\x00'
+                    b'\x00\x38\x44\x44\x48\x7f\x00\x00'
+                    b'\x00\x38\x54\x54\x54\x18\x00\x00'
+                    b'\x00\x08\x7e\x09\x02\x00\x00\x00'
+                    b'\x00\x18\xa4\xa4\xa4\x7c\x00\x00'
+                    b'\x00\x7f\x08\x04\x04\x78\x00\x00'
+                    b'\x00\x00\x7d\x00\x00\x00\x00\x00'
+                    b'\x00\x80\x84\x7d\x00\x00\x00\x00'
+                    b'\x00\x7f\x10\x28\x44\x00\x00\x00'
+                    b'\x00\x41\x7f\x40\x00\x00\x00\x00'
+                    b'\x00\x7c\x04\x18\x04\x78\x00\x00'
+                    b'\x00\x7c\x08\x04\x7c\x00\x00\x00'
+                    b'\x00\x38\x44\x44\x38\x00\x00\x00'
+                    b'\x00\xfc\x24\x24\x18\x00\x00\x00'
+                    b'\x00\x18\x24\x24\xfc\x00\x00\x00'
+                    b'\x00\x00\x7c\x08\x04\x00\x00\x00'
+                    b'\x00\x48\x54\x54\x24\x00\x00\x00'
+                    b'\x00\x04\x7f\x44\x00\x00\x00\x00'
+                    b'\x00\x3c\x40\x40\x7c\x00\x00\x00'
+                    b'\x00\x1c\x20\x40\x20\x1c\x00\x00'
+                    b'\x00\x3c\x40\x30\x40\x3c\x00\x00'
+                    b'\x00\x44\x28\x10\x28\x44\x00\x00'
+                    b'\x00\x1c\xa0\xa0\x7c\x00\x00\x00'
+                    b'\x00\x44\x64\x54\x4c\x44\x00\x00'
+                    b'\x00\x08\x36\x41\x00\x00\x00\x00'
+                    b'\x00\x00\x7f\x00\x00\x00\x00\x00'
+                    b'\x00\x41\x36\x08\x00\x00\x00\x00'
+                    b'\x00\x02\x01\x01\x02\x01\x00\x00'
+                    b'\x00\x02\x05\x05\x02\x00\x00\x00')
+
+_FONT_VIEW       = memoryview(_FONT)
+
+# Each bit of a nibble doubled, used to scale glyph columns to 2x height
+_DOUBLE          = bytes([0x00, 0x03, 0x0C, 0x0F, 0x30, 0x33, 0x3C, 0x3F,
+                          0xC0, 0xC3, 0xCC, 0xCF, 0xF0, 0xF3, 0xFC, 0xFF])
 
 # The follow initialization sequence was not in the Seeedstudio example,
 # but from testing and the datasheet it is required.
@@ -141,9 +153,21 @@ _INIT_COMMANDS = [[0xAE],
                   [0xd6, 1],
                   [0xaf]]
 
-class OledSSD1315:
-    def __init__(self):
+def _glyph_offset(char):
+    # Start of the character's glyph in _FONT, anything outside ASCII 32-127 is a space
+    code = ord(char)
+    if code < 32 or code > 127:
+        code = 32
+    return (code - 32) * _GLYPH_SIZE
+
+class OledSSD1315(FrameBuffer):
+    def __init__(self, glyph_width = 8):
+        # glyph_width 6 gives 21 characters per row instead of 16
+        assert glyph_width in (6, 8)
+        
         self._device_address = _DEFAULT_ADDRESS
+        self._glyph_width = glyph_width
+        self._init_framebuffer(_WIDTH, _HEIGHT)
  
         for cmd in _INIT_COMMANDS:
             i2c.write(self._device_address, b'\x00' + bytearray(cmd))
@@ -158,25 +182,42 @@ class OledSSD1315:
     def _write_command(self, address, value):
         i2c.write(self._device_address, bytes((address, value)))
                 
-    def _set_cursor(self, row, column):
-        self._write_command(_COMMAND_MODE, 0xB0 + row)
-        self._write_command(_COMMAND_MODE, 0x00 + (8 * column & 0x0F))
-        self._write_command(_COMMAND_MODE, 0x10 + ((8 * column >> 4) & 0x0F))
- 
-    def _write_character(self, value):
-        value = ord(value)
+    def _render_row(self, buffer, index, value):
+        width = self._glyph_width
         
-        # We only handle ASCII characters
-        if value < 32 or value > 127:
-            value = ' '
-            value = ord(value)
- 
-        for i in range(0, 8):
-            self._write_command(_DATA_MODE, _FONT[value - 32][i])
- 
-    def _write_string(self, value):
-        for char in value:
-            self._write_character(char)
+        for i in range(min(len(value), _WIDTH // width)):
+            offset = _glyph_offset(value[i])
+            buffer[index:index + width] = _FONT_VIEW[offset:offset + width]
+            index += width
+    
+    def _render(self, row, column, value, scale = 1):
+        # Draws text into the framebuffer, clipped to the end of the row
+        width = self._glyph_width
+        step = width * scale
+        count = min(len(value), _WIDTH // step - column)
+        if count <= 0 or row + scale > self._pages:
+            return
+        
+        buffer = self._buffer
+        index = row * _WIDTH + column * step + 1
+        
+        if scale == 1:
+            self._render_row(buffer, index, value[:count])
+        else:
+            for i in range(count):
+                offset = _glyph_offset(value[i])
+                for j in range(width):
+                    bits = _FONT[offset + j]
+                    top = _DOUBLE[bits & 0x0F]
+                    bottom = _DOUBLE[bits >> 4]
+                    
+                    buffer[index + 2 * j] = buffer[index + 2 * j + 1] = top
+                    buffer[index + _WIDTH + 2 * j] = buffer[index + _WIDTH + 2 * j + 1] = bottom
+                
+                index += step
+        
+        for page in range(row, row + scale):
+            self._mark_dirty(page, column * step, (column + count) * step)
     
     def get_inverse(self):
         return self._inverse
@@ -192,24 +233,25 @@ class OledSSD1315:
         self._write_command(_COMMAND_MODE, _DISPLAY_OFF)
     
     def clear(self):
-        self.off()
-        for i in range(8):
-            self._set_cursor(i, 0)
-            self._write_string(' ' * 16)
- 
-        self.on()
-        self._set_cursor(0, 0)
+        # The blank framebuffer goes out in a single transaction
+        self.fill(0)
+        self.show()
         
-    def string(self, x, y, value):
-        self._set_cursor(x, y)
-        self._write_string(value)
+    def string(self, x, y, value, draw = True, scale = 1):
+        # x is the page row and y the character column; each row goes out as a single
+        # data transaction, pass draw=False to batch several strings into one show().
+        # scale 2 draws double size characters over rows x and x + 1
+        assert scale in (1, 2)
         
-    def character(self, x, y, value):
-        self._set_cursor(x, y)
-        self._write_character(value)
+        self._render(x, y, value, scale)
+        if draw:
+            self.show()
         
-    def number(self, x, y, value):
-        self.string(x, y, str(value))
+    def character(self, x, y, value, draw = True, scale = 1):
+        self.string(x, y, value[0], draw, scale)
+        
+    def number(self, x, y, value, draw = True, scale = 1):
+        self.string(x, y, str(value), draw, scale)
         
 def main():
     i2c.init()
@@ -241,7 +283,35 @@ def main():
     display.clear()
     display.string(2, 4, 'The End')
     sleep(1000)
+    
+    display.clear()
+    display.rect(0, 0, _WIDTH, _HEIGHT)
+    display.line(0, 0, _WIDTH - 1, _HEIGHT - 1)
+    display.line(0, _HEIGHT - 1, _WIDTH - 1, 0)
+    display.fill_rect(48, 16, 32, 32)
+    display.show()
+    sleep(3000)
+    
+    console = display.console()
+    for i in range(20):
+        console.append('Log line {}'.format(i))
+        sleep(250)
+    console.close()
+    display.clear()
     display.off()
     
+def footprint():
+    # Import cost of the font as one bytes literal versus the list of lists of ints it
+    # replaced, each written to a module of its own. Needs sundry/measure.py alongside
+    from measure import import_cost, write_font_module, remove_modules
+    
+    for layout in ('bytes', 'lists'):
+        name = '_font_' + layout
+        write_font_module(name, _FONT, _GLYPH_SIZE, layout)
+        allocated, resident, elapsed = import_cost((name,))
+        remove_modules((name,))
+        
+        print("{}: import {} us, {} bytes allocated, {} bytes resident".format(layout, elapsed, allocated, resident))
+    
 if __name__ == '__main__':
     main()
@@ -0,0 +1,287 @@
+# ------------------------------------------------------------------------------------------
+# Copyright James A. Dooley 2021.
+#
+# Distributed under the MIT License.
+# (See accompanying file license.md file or copy at http://opensource.org/licenses/MIT)
+#
+# ------------------------------------------------------------------------------------------
+
+# Framebuffer and drawing primitives shared by the SSD1306 and SSD1315 OLED drivers, copy
+# this file to the micro:bit alongside oled-ssd1306.py or oled-ssd1315.py.
+#
+# The buffer uses the controllers' native page layout: one byte per column per 8-pixel
+# page, least significant bit at the top. Byte 0 holds the data-mode control byte so the
+# whole buffer can be sent as is.
+
+from microbit import i2c
+
+_RAM_PAGES = 8 # Display RAM is 128 x 64 on both controllers
+
+class Console:
+    # Log-tail text using the display start line. Each appended line is rendered into one
+    # row and written straight to display RAM, then the start line moves down a page so
+    # the controller scrolls; the cost per line is two transactions whatever is on screen.
+    # Normal drawing and show() should not be used until close() is called
+    def __init__(self, display):
+        self._display = display
+        self._visible = display._pages
+        self._row = bytearray(display._width + 1)
+        self._row[0] = 0x40
+        self._top = 0
+        self._count = 0
+
+        for page in range(_RAM_PAGES):
+            display._write_commands((0x21, 0, display._width - 1, 0x22, page, page, 0x40))
+            i2c.write(display._device_address, self._row)
+
+    def append(self, value):
+        display = self._display
+        row = self._row
+
+        if self._count < self._visible:
+            page = self._count
+            self._count += 1
+            line = self._top << 3
+        else:
+            # The new line goes into the RAM page just below the window, which scrolls
+            # down one page to take it in
+            page = (self._top + self._visible) % _RAM_PAGES
+            self._top = (self._top + 1) % _RAM_PAGES
+            line = self._top << 3
+
+        row[1:] = display._blank_page
+        display._render_row(row, 1, value)
+
+        display._write_commands((0x21, 0, display._width - 1, 0x22, page, page, 0x40 | line))
+        i2c.write(display._device_address, row)
+
+    def close(self):
+        # Restores the start line, the caller is expected to clear() or redraw afterwards
+        self._display._write_commands((0x40,))
+
+class FrameBuffer:
+    def _init_framebuffer(self, width, height):
+        self._width = width
+        self._height = height
+        self._pages = height >> 3
+
+        self._buffer = bytearray(width * self._pages + 1)
+        self._buffer[0] = 0x40
+        self._blank_page = bytes(width)
+
+        # Dirty column window per page, start >= end when the page is clean
+        self._dirty_start = bytearray([width] * self._pages)
+        self._dirty_end = bytearray(self._pages)
+
+    def _write_commands(self, commands):
+        i2c.write(self._device_address, b'\x00' + bytes(commands))
+
+    def _mark_dirty(self, page, start, end):
+        if start < self._dirty_start[page]:
+            self._dirty_start[page] = start
+        if end > self._dirty_end[page]:
+            self._dirty_end[page] = end
+
+    def _mark_area(self, x0, y0, x1, y1):
+        # Marks the pages covering rows y0..y1 and columns x0..x1 inclusive
+        for page in range(y0 >> 3, (y1 >> 3) + 1):
+            self._mark_dirty(page, x0, x1 + 1)
+
+    def show(self):
+        # A fully dirty buffer goes out in one transaction, otherwise each page's dirty
+        # window is sent on its own; one command transaction sets the column and page
+        # range and one data transaction fills it
+        width = self._width
+        pages = self._pages
+
+        full = True
+        for page in range(pages):
+            if self._dirty_start[page] != 0 or self._dirty_end[page] != width:
+                full = False
+                break
+
+        if full:
+            self._write_commands((0x21, 0, width - 1, 0x22, 0, pages - 1))
+            i2c.write(self._device_address, self._buffer)
+        else:
+            for page in range(pages):
+                start = self._dirty_start[page]
+                end = self._dirty_end[page]
+                if start >= end:
+                    continue
+
+                self._write_commands((0x21, start, end - 1, 0x22, page, page))
+
+                offset = page * width + 1
+                i2c.write(self._device_address, b'\x40' + self._buffer[offset + start:offset + end])
+
+        for page in range(pages):
+            self._dirty_start[page] = width
+            self._dirty_end[page] = 0
+
+    def console(self):
+        return Console(self)
+
+    def fill(self, color = 0):
+        value = 0xFF if color else 0x00
+        width = self._width
+
+        for page in range(self._pages):
+            offset = page * width + 1
+            if value:
+                for i in range(offset, offset + width):
+                    self._buffer[i] = value
+            else:
+                self._buffer[offset:offset + width] = self._blank_page
+            self._mark_dirty(page, 0, width)
+
+    def pixel(self, x, y, color = 1):
+        if x < 0 or x >= self._width or y < 0 or y >= self._height:
+            return
+
+        page = y >> 3
+        index = page * self._width + x + 1
+
+        if color:
+            self._buffer[index] |= 1 << (y & 7)
+        else:
+            self._buffer[index] &= ~(1 << (y & 7))
+
+        self._mark_dirty(page, x, x + 1)
+
+    def hline(self, x, y, w, color = 1):
+        # Every column shares one page and one bit, so the mask is computed once
+        if y < 0 or y >= self._height:
+            return
+
+        x0 = max(x, 0)
+        x1 = min(x + w, self._width)
+        if x0 >= x1:
+            return
+
+        page = y >> 3
+        offset = page * self._width + 1
+        mask = 1 << (y & 7)
+        buffer = self._buffer
+
+        if color:
+            for i in range(offset + x0, offset + x1):
+                buffer[i] |= mask
+        else:
+            mask = ~mask
+            for i in range(offset + x0, offset + x1):
+                buffer[i] &= mask
+
+        self._mark_dirty(page, x0, x1)
+
+    def vline(self, x, y, h, color = 1):
+        self.fill_rect(x, y, 1, h, color)
+
+    def rect(self, x, y, w, h, color = 1):
+        if w <= 0 or h <= 0:
+            return
+
+        self.hline(x, y, w, color)
+        self.hline(x, y + h - 1, w, color)
+        self.vline(x, y, h, color)
+        self.vline(x + w - 1, y, h, color)
+
+    def fill_rect(self, x, y, w, h, color = 1):
+        # Works a page at a time: full pages are written as whole bytes, partial pages
+        # with one mask per page
+        x0 = max(x, 0)
+        x1 = min(x + w, self._width)
+        y0 = max(y, 0)
+        y1 = min(y + h, self._height)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        buffer = self._buffer
+        width = self._width
+
+        for page in range(y0 >> 3, ((y1 - 1) >> 3) + 1):
+            top = max(y0 - (page << 3), 0)
+            bottom = min(y1 - (page << 3), 8)
+            mask = ((1 << bottom) - 1) & ~((1 << top) - 1)
+            offset = page * width + 1
+
+            if mask == 0xFF:
+                value = 0xFF if color else 0x00
+                for i in range(offset + x0, offset + x1):
+                    buffer[i] = value
+            elif color:
+                for i in range(offset + x0, offset + x1):
+                    buffer[i] |= mask
+            else:
+                mask = ~mask
+                for i in range(offset + x0, offset + x1):
+                    buffer[i] &= mask
+
+            self._mark_dirty(page, x0, x1)
+
+    def line(self, x0, y0, x1, y1, color = 1):
+        # Bresenham, clipping is left to pixel()
+        if y0 == y1:
+            self.hline(min(x0, x1), y0, abs(x1 - x0) + 1, color)
+            return
+
+        if x0 == x1:
+            self.vline(x0, min(y0, y1), abs(y1 - y0) + 1, color)
+            return
+
+        dx = abs(x1 - x0)
+        dy = -abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        error = dx + dy
+
+        while True:
+            self.pixel(x0, y0, color)
+            if x0 == x1 and y0 == y1:
+                break
+
+            e2 = 2 * error
+            if e2 >= dy:
+                error += dy
+                x0 += sx
+            if e2 <= dx:
+                error += dx
+                y0 += sy
+
+    def blit(self, bitmap, x, y, w, h):
+        # bitmap is in page layout, w bytes per 8-row band. Page-aligned bitmaps are copied
+        # a band at a time, anything else bit by bit
+        x0 = max(x, 0)
+        x1 = min(x + w, self._width)
+        y0 = max(y, 0)
+        y1 = min(y + h, self._height)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        buffer = self._buffer
+        width = self._width
+
+        if y & 7 == 0 and h & 7 == 0:
+            for row in range(y0, y1, 8):
+                source = ((row - y) >> 3) * w + (x0 - x)
+                offset = (row >> 3) * width + 1
+                buffer[offset + x0:offset + x1] = bitmap[source:source + x1 - x0]
+
+            self._mark_area(x0, y0, x1 - 1, y1 - 1)
+            return
+
+        for row in range(y0, y1):
+            sy = row - y
+            band = (sy >> 3) * w
+            bit = 1 << (sy & 7)
+            page = row >> 3
+            offset = page * width + 1
+            mask = 1 << (row & 7)
+
+            for column in range(x0, x1):
+                if bitmap[band + column - x] & bit:
+                    buffer[offset + column] |= mask
+                else:
+                    buffer[offset + column] &= ~mask
+
+        self._mark_area(x0, y0, x1 - 1, y1 - 1)
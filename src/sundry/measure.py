@@ -0,0 +1,66 @@
+# ------------------------------------------------------------------------------------------
+# Copyright James A. Dooley 2021.
+#
+# Distributed under the MIT License.
+# (See accompanying file license.md file or copy at http://opensource.org/licenses/MIT)
+#
+# ------------------------------------------------------------------------------------------
+
+# Development helpers for measuring what importing a module costs on the micro:bit. Copy
+# this file alongside an example to run its footprint() function; the examples only
+# import it from inside footprint()
+
+from utime import ticks_us, ticks_diff
+import gc
+import os
+import sys
+
+def import_cost(names):
+    # Imports the named modules fresh and returns (allocated, resident, us): the bytes
+    # allocated while compiling and running them, the bytes they still hold once garbage
+    # is collected, and the time taken. The modules are unloaded again afterwards
+    for name in names:
+        sys.modules.pop(name, None)
+    
+    gc.collect()
+    free = gc.mem_free()
+    start = ticks_us()
+    modules = [__import__(name) for name in names]
+    elapsed = ticks_diff(ticks_us(), start)
+    allocated = free - gc.mem_free()
+    gc.collect()
+    resident = free - gc.mem_free()
+    
+    del modules
+    for name in names:
+        del sys.modules[name]
+    
+    return allocated, resident, elapsed
+
+def copy_module(source, name):
+    # Copies a source file to name.py in small chunks
+    with open(source, 'rb') as reader, open(name + '.py', 'wb') as writer:
+        while True:
+            chunk = reader.read(256)
+            if not chunk:
+                break
+            writer.write(chunk)
+
+def write_font_module(name, font, glyph_size, layout):
+    # Writes a font as Python source to name.py, one glyph per line, either as a single
+    # bytes literal ('bytes') or as a list of lists of ints ('lists')
+    with open(name + '.py', 'w') as file:
+        file.write('FONT = ' + ('[' if layout == 'lists' else 'b\'\\\n'))
+        
+        for i in range(0, len(font), glyph_size):
+            glyph = font[i:i + glyph_size]
+            if layout == 'lists':
+                file.write('[' + ', '.join('0x{:02X}'.format(b) for b in glyph) + '],\n')
+            else:
+                file.write(''.join('\\x{:02x}'.format(b) for b in glyph) + '\\\n')
+        
+        file.write(']\n' if layout == 'lists' else '\'\n')
+
+def remove_modules(names):
+    for name in names:
+        os.remove(name + '.py')
@@ -0,0 +1,92 @@
+# ------------------------------------------------------------------------------------------
+# Copyright James A. Dooley 2021.
+#
+# Distributed under the MIT License.
+# (See accompanying file license.md file or copy at http://opensource.org/licenses/MIT)
+#
+# ------------------------------------------------------------------------------------------
+
+# Stand-ins for the micro:bit modules so the examples can be loaded and checked on a host
+# with CPython. Only what the checked code touches is provided; nothing here talks to
+# real hardware
+
+import importlib.util
+import os
+import struct
+import sys
+import time
+import types
+
+_SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+class I2C:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, address, data):
+        self.writes.append((address, bytes(data)))
+
+    def read(self, address, count):
+        return bytes(count)
+
+class Pin:
+    def write_digital(self, value):
+        pass
+
+    def read_digital(self):
+        return 1
+
+def _ticks_us():
+    return int(time.monotonic() * 1000000)
+
+def _ticks_ms():
+    return int(time.monotonic() * 1000)
+
+def _install():
+    if 'microbit' in sys.modules:
+        return
+
+    # Shared modules such as ahtx0 and oled_framebuffer sit beside the examples
+    sys.path.insert(0, _SRC)
+
+    microbit = types.ModuleType('microbit')
+    microbit.i2c = I2C()
+    microbit.pin0 = Pin()
+    microbit.pin1 = Pin()
+    microbit.uart = types.SimpleNamespace(write=lambda data: None)
+    microbit.display = types.SimpleNamespace(clear=lambda: None, show=lambda value: None)
+    microbit.button_a = types.SimpleNamespace(was_pressed=lambda: False)
+    microbit.button_b = types.SimpleNamespace(was_pressed=lambda: False)
+    microbit.sleep = lambda ms: None
+    sys.modules['microbit'] = microbit
+
+    utime = types.ModuleType('utime')
+    utime.sleep_us = lambda us: None
+    utime.sleep_ms = lambda ms: None
+    utime.ticks_us = _ticks_us
+    utime.ticks_ms = _ticks_ms
+    utime.ticks_add = lambda ticks, delta: ticks + delta
+    utime.ticks_diff = lambda a, b: a - b
+    sys.modules['utime'] = utime
+
+    sys.modules['ustruct'] = struct
+
+    micropython = types.ModuleType('micropython')
+    micropython.const = lambda value: value
+    sys.modules['micropython'] = micropython
+
+    machine = types.ModuleType('machine')
+    machine.time_pulse_us = lambda pin, level, timeout: -1
+    sys.modules['machine'] = machine
+
+def i2c():
+    _install()
+    return sys.modules['microbit'].i2c
+
+def load(name):
+    # Loads src/<name>.py, file names with dashes and sundry/ scripts included
+    _install()
+    spec = importlib.util.spec_from_file_location(os.path.basename(name).replace('-', '_'), os.path.join(_SRC, name + '.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
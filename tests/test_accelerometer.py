@@ -0,0 +1,91 @@
+# ------------------------------------------------------------------------------------------
+# Copyright James A. Dooley 2021.
+#
+# Distributed under the MIT License.
+# (See accompanying file license.md file or copy at http://opensource.org/licenses/MIT)
+#
+# ------------------------------------------------------------------------------------------
+
+# Host checks for the LIS3DHTR driver, run with: python -m pytest tests
+
+import struct
+from array import array
+
+import host_stubs
+
+accel = host_stubs.load('3-axis-digital-accelerometer')
+
+class _Sensor(accel.ThreeAxisDigitalAccelerometer):
+    # Serves FIFO_SRC and the output registers from a queue of samples
+    def __init__(self, samples = (), **kwargs):
+        self._samples = list(samples)
+        super().__init__(**kwargs)
+    
+    def _read_register(self, address, num_bytes):
+        if address == accel._LIS3DHTR_REG_FIFO_SRC:
+            return bytes([len(self._samples) if self._samples else accel._LIS3DHTR_FIFO_SRC_EMPTY])
+        
+        count = num_bytes // 6
+        data = b''.join(struct.pack('<hhh', *sample) for sample in self._samples[:count])
+        del self._samples[:count]
+        return data.ljust(num_bytes, b'\x00')
+
+def test_drain_decodes_signed_samples():
+    samples = [(0, 1, -1), (32767, -32768, 16384), (-16, 256, -256)]
+    sensor = _Sensor(samples)
+    buffer = array('h', [0] * 12)
+    
+    assert sensor.drain(buffer) == 3
+    assert list(buffer[:9]) == [value for sample in samples for value in sample]
+    assert list(buffer[9:]) == [0, 0, 0]
+
+def test_drain_raw_bytes():
+    samples = [(1, -2, 3), (-4, 5, -6)]
+    sensor = _Sensor(samples)
+    buffer = bytearray(6)
+    
+    assert sensor.drain(buffer) == 1
+    assert bytes(buffer) == struct.pack('<hhh', *samples[0])
+
+def test_interrupt_pending_needs_pin():
+    sensor = _Sensor()
+    
+    try:
+        sensor.interrupt_pending()
+    except AssertionError as error:
+        assert 'interrupt_pin' in str(error)
+    else:
+        assert False
+    
+    assert _Sensor(interrupt_pin = host_stubs.Pin()).interrupt_pending()
+
+def _rejected(build):
+    try:
+        build()
+    except AssertionError:
+        return True
+    return False
+
+def test_datarate_validated_against_mode():
+    assert _rejected(lambda: _Sensor(datarate = 0x85))
+    assert _rejected(lambda: _Sensor(datarate = accel._LIS3DHTR_ACCL_DR_1620))
+    assert _rejected(lambda: _Sensor(datarate = accel._LIS3DHTR_ACCL_DR_1620, mode = accel.MODE_HIGH_RESOLUTION))
+    
+    sensor = _Sensor(datarate = accel._LIS3DHTR_ACCL_DR_1620, mode = accel.MODE_LOW_POWER)
+    assert _rejected(lambda: sensor.set_mode(accel.MODE_NORMAL))
+    assert sensor._mode == accel.MODE_LOW_POWER
+    
+    sensor = _Sensor(datarate = accel._LIS3DHTR_ACCL_DR_1344)
+    assert _rejected(lambda: sensor.set_datarate(accel._LIS3DHTR_ACCL_DR_1620))
+    assert sensor._datarate == accel._LIS3DHTR_ACCL_DR_1344
+    
+    sensor.set_mode(accel.MODE_LOW_POWER)
+    sensor.set_datarate(accel._LIS3DHTR_ACCL_DR_1620)
+
+def test_g_range():
+    sensor = _Sensor(g_range = 8)
+    assert sensor._range == 8
+    
+    sensor.set_range(16)
+    assert sensor._range == 16
+    assert _rejected(lambda: sensor.set_range(3))
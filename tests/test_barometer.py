@@ -0,0 +1,104 @@
+# ------------------------------------------------------------------------------------------
+# Copyright James A. Dooley 2021.
+#
+# Distributed under the MIT License.
+# (See accompanying file license.md file or copy at http://opensource.org/licenses/MIT)
+#
+# ------------------------------------------------------------------------------------------
+
+# Host checks for the BMP280 sample and altitude handling, run with: python -m pytest tests
+
+import struct
+
+import host_stubs
+
+baro = host_stubs.load('grove_barometer_sensor')
+
+# Calibration and raw readings from the worked example in the BMP280 datasheet
+_CALIBRATION = struct.pack('<HhhHhhhhhhhh', 27504, 26435, -1000, 36477, -10685, 3024, 2855, 140, -7, 15500, -14600, 6000)
+_TEMPERATURE_RAW = 519888
+_PRESSURE_RAW = 415148
+
+class _Sensor(baro.GroveBarometerSensor):
+    # Answers register reads from the datasheet example and counts conversions read
+    def __init__(self, **kwargs):
+        self.conversions = 0
+        super().__init__(**kwargs)
+    
+    def _read_register(self, address, num_bytes):
+        if address == baro._BMP280_REG_CHIPID:
+            return bytes([baro._BMP280_CHIPID])
+        if address == baro._BMP280_REG_DIG_T1:
+            return _CALIBRATION
+        if address == baro._BMP280_REGISTER_DATA:
+            self.conversions += 1
+            return bytes([_PRESSURE_RAW >> 12, (_PRESSURE_RAW >> 4) & 0xFF, (_PRESSURE_RAW & 0x0F) << 4,
+                          _TEMPERATURE_RAW >> 12, (_TEMPERATURE_RAW >> 4) & 0xFF, (_TEMPERATURE_RAW & 0x0F) << 4])
+        return bytes(num_bytes)
+
+def _count_altitude_calls():
+    calls = []
+    original = baro._altitude
+    
+    def counted(pressure, sea_level_pressure):
+        calls.append(pressure)
+        return original(pressure, sea_level_pressure)
+    
+    baro._altitude = counted
+    return calls, original
+
+def test_altitude_table_built_on_first_lookup():
+    calls, original = _count_altitude_calls()
+    try:
+        sensor = _Sensor()
+        sensor.measure().temperature()
+        assert calls == []
+        
+        sensor.measure().altitude()
+        assert len(calls) == baro._ALTITUDE_TABLE_SIZE
+        
+        sensor.measure()._altitude = None
+        sensor.measure().altitude()
+        assert len(calls) == baro._ALTITUDE_TABLE_SIZE
+    finally:
+        baro._altitude = original
+
+def test_sea_level_change_keeps_sample():
+    sensor = _Sensor(max_age_ms = 60000)
+    sample = sensor.measure()
+    before = sample.altitude()
+    
+    sensor.set_sea_level_pressure(1000)
+    
+    assert sensor.measure() is sample
+    assert sensor.conversions == 1
+    assert sample.altitude() != before
+    assert abs(sample.altitude() - baro._altitude(sample.pressure() * 100, 100000)) < 100
+
+def test_integer_altitude_uses_exact_pascals():
+    sensor = _Sensor(integer = True)
+    sample = sensor.measure()
+    pascals = sensor._compensate_pressure_int(sample._fine(), _PRESSURE_RAW)
+    
+    looked_up = []
+    lookup = sensor._lookup_altitude
+    sensor._lookup_altitude = lambda pressure: looked_up.append(pressure) or lookup(pressure)
+    sample.altitude()
+    
+    assert looked_up == [pascals]
+    assert type(looked_up[0]) is int
+
+def test_integer_pascals_survive_every_value():
+    # The lookup sees each compensated value unchanged, where the old hPa round trip
+    # lost 1 Pa on thousands of them
+    sensor = _Sensor(integer = True)
+    
+    for pascals in range(30000, 110001, 7):
+        sample = baro.BarometerSample(sensor, 0, _TEMPERATURE_RAW, _PRESSURE_RAW)
+        sample._pascals = pascals
+        
+        looked_up = []
+        sensor._lookup_altitude = looked_up.append
+        sample.altitude()
+        
+        assert looked_up == [pascals]
@@ -0,0 +1,157 @@
+# ------------------------------------------------------------------------------------------
+# Copyright James A. Dooley 2021.
+#
+# Distributed under the MIT License.
+# (See accompanying file license.md file or copy at http://opensource.org/licenses/MIT)
+#
+# ------------------------------------------------------------------------------------------
+
+# Host checks for the DHT11/DHT22 capture and decode, fed with synthetic waveforms. Run
+# with: python -m pytest tests
+
+from array import array
+
+import host_stubs
+
+dht = host_stubs.load('grove_temperature_and_humidity_sensor')
+
+_ZERO_US = 27
+_ONE_US = 70
+
+def _frame(humidity, temperature):
+    # DHT22 data bytes with checksum
+    data = [humidity >> 8, humidity & 0xFF, temperature >> 8, temperature & 0xFF]
+    return data + [sum(data) & 0xFF]
+
+def _bit_widths(data):
+    widths = []
+    for byte in data:
+        for bit in range(7, -1, -1):
+            widths.append(_ONE_US if byte & (1 << bit) else _ZERO_US)
+    return widths
+
+def _waveform(data, release_us = 30):
+    # (level, duration) from the host releasing the line: idle high, the sensor's 80us
+    # low and 80us high response, then a 50us low and a high pulse per bit
+    segments = [(1, release_us), (0, 80), (1, 80)]
+    for width in _bit_widths(data):
+        segments += [(0, 50), (1, width)]
+    return segments + [(0, 50)]
+
+class _Line:
+    # Replays a waveform for time_pulse_us on a virtual clock. latency_us is how long
+    # the interpreter takes to get into each call, 0 models an infinitely fast one
+    def __init__(self, segments, latency_us = 0):
+        self._segments = segments
+        self._latency = latency_us
+        self._now = 0
+    
+    def _segment(self):
+        start = 0
+        for level, duration in self._segments:
+            if self._now < start + duration:
+                return level, start + duration
+            start += duration
+        return 1, None # Pulled up once the sensor lets go
+    
+    def time_pulse_us(self, pin, level, timeout):
+        self._now += self._latency
+        waited = 0
+        current, end = self._segment()
+        while current != level:
+            if end is None:
+                return -2
+            waited += end - self._now
+            self._now = end
+            if waited > timeout:
+                return -2
+            current, end = self._segment()
+        
+        if end is None:
+            return -1
+        width = end - self._now
+        self._now = end
+        return width if width <= timeout else -1
+
+def _sensor(segments, latency_us = 0):
+    sensor = dht.GroveTemperatureAndHumiditySensor(host_stubs.Pin(), dht.DHT_22)
+    dht.time_pulse_us = _Line(segments, latency_us).time_pulse_us
+    return sensor
+
+def _read(segments, latency_us = 0):
+    sensor = _sensor(segments, latency_us)
+    return sensor._read(), sensor._data
+
+def test_decode_well_formed():
+    data = _frame(652, 231)
+    pulses = array('i', [80] + _bit_widths(data))
+    decoded = bytearray(5)
+    
+    assert dht._decode(pulses, decoded)
+    assert list(decoded) == data
+
+def test_decode_rejects_shifted_train():
+    # What a capture that timed the release idle as the response used to produce
+    data = _frame(652, 231)
+    pulses = array('i', [30, 80] + _bit_widths(data)[:-1])
+    
+    assert not dht._decode(pulses, bytearray(5))
+
+def test_decode_rejects_timeout():
+    pulses = array('i', [80] + _bit_widths(_frame(652, 231)))
+    pulses[20] = -1
+    
+    assert not dht._decode(pulses, bytearray(5))
+
+def test_read_syncs_on_response():
+    for release_us in (20, 30, 40):
+        data = _frame(652, 0x8000 | 101)
+        ok, decoded = _read(_waveform(data, release_us))
+        
+        assert ok
+        assert list(decoded) == data
+
+def test_decode_rejects_all_zero_frame():
+    # Passes the checksum, but it is what a capture timing every 1 bit short reads
+    pulses = array('i', [80] + [_ZERO_US] * 40)
+    
+    assert not dht._decode(pulses, bytearray(5))
+
+def test_read_tolerates_latency():
+    # A 1 bit still times above the 50us threshold while the interpreter gets into
+    # time_pulse_us less than 20us into its 70us high, 69us after the falling edge
+    data = _frame(652, 0x8000 | 101)
+    
+    for latency_us in range(0, 70):
+        ok, decoded = _read(_waveform(data), latency_us)
+        
+        assert ok, latency_us
+        assert list(decoded) == data
+
+def test_read_fails_with_too_much_latency():
+    # Past that every 1 bit reads short, then whole pulses are missed; either way the
+    # read must fail rather than report 0% at 0C
+    data = _frame(652, 0x8000 | 101)
+    
+    for latency_us in range(70, 120):
+        sensor = _sensor(_waveform(data), latency_us)
+        temperature, humidity, timestamp, fresh = sensor.measure()
+        
+        assert not fresh, latency_us
+        assert timestamp is None
+
+def test_read_without_response_fails():
+    ok, decoded = _read([(1, 1000)])
+    
+    assert not ok
+
+if __name__ == '__main__':
+    test_decode_well_formed()
+    test_decode_rejects_shifted_train()
+    test_decode_rejects_timeout()
+    test_read_syncs_on_response()
+    test_decode_rejects_all_zero_frame()
+    test_read_tolerates_latency()
+    test_read_fails_with_too_much_latency()
+    test_read_without_response_fails()
+    print('OK')
@@ -0,0 +1,126 @@
+# ------------------------------------------------------------------------------------------
+# Copyright James A. Dooley 2021.
+#
+# Distributed under the MIT License.
+# (See accompanying file license.md file or copy at http://opensource.org/licenses/MIT)
+#
+# ------------------------------------------------------------------------------------------
+
+# Host checks for the Lcd16x2 buffer and address tracking, run with: python -m pytest tests
+
+import host_stubs
+
+lcd16x2 = host_stubs.load('lcd16x2')
+
+def _last_command(lcd):
+    # The last register write as (control byte, value)
+    address, data = host_stubs.i2c().writes[-1]
+    return data[0], data[1]
+
+def test_glyph_upload_after_full_row_flush():
+    lcd = lcd16x2.Lcd16x2()
+    lcd.text(0, 1, 'x' * 16)
+    lcd.flush()
+    
+    lcd.define_glyph('bar', [0x1f] * 8)
+    assert lcd.glyph('bar') == chr(0)
+    
+    # Put back on the DDRAM address just past the end of row 2
+    assert _last_command(lcd) == (0x80, 0x80 | 0x50)
+
+def test_glyph_upload_restores_cursor():
+    lcd = lcd16x2.Lcd16x2()
+    lcd.set_cursor(3, 1)
+    lcd.write('ab')
+    
+    lcd.define_glyph('bar', [0x1f] * 8)
+    lcd.glyph('bar')
+    
+    assert _last_command(lcd) == (0x80, 0x80 | 0x45)
+
+def test_write_past_row_end_stays_off_screen():
+    lcd = lcd16x2.Lcd16x2()
+    lcd.write('a' * 16)
+    lcd.write('XY')
+    
+    # The controller put XY in off-screen DDRAM on row 1, row 2 is still blank
+    assert bytes(lcd._glass[16:18]) == b'  '
+    
+    lcd.text(0, 1, 'XY')
+    lcd.flush()
+    
+    address, data = host_stubs.i2c().writes[-1]
+    assert data == bytes([0x80, 0x80 | 0x40, 0x40]) + b'XY'
+    assert bytes(lcd._glass[16:18]) == b'XY'
+
+def test_write_wraps_to_next_row():
+    lcd = lcd16x2.Lcd16x2()
+    lcd.set_cursor(0, 0)
+    lcd.write('a' * 40 + 'bc')
+    
+    assert bytes(lcd._glass[:16]) == b'a' * 16
+    assert bytes(lcd._glass[16:19]) == b'bc '
+    assert lcd._address == 0x42
+
+def test_text_rejects_out_of_range():
+    lcd = lcd16x2.Lcd16x2()
+    
+    for col, row in ((16, 0), (-1, 0), (0, 2), (0, -1)):
+        try:
+            lcd.text(col, row, 'x')
+        except AssertionError:
+            pass
+        else:
+            assert False, (col, row)
+    
+    assert len(lcd._shadow) == 32
+
+def test_write_right_to_left():
+    lcd = lcd16x2.Lcd16x2()
+    lcd.right_to_left()
+    lcd.set_cursor(5, 0)
+    lcd.write('abc')
+    
+    assert bytes(lcd._glass[:8]) == b'   cba  '
+    assert lcd._address == 0x02
+    
+    # Stepping down past column 0 of row 2 wraps to the end of row 1's off-screen DDRAM
+    lcd.set_cursor(0, 1)
+    lcd.write('xy')
+    
+    assert lcd._glass[16] == ord('x')
+    assert lcd._address == 0x26
+
+def test_flush_right_to_left():
+    lcd = lcd16x2.Lcd16x2()
+    lcd.right_to_left()
+    lcd.text(2, 1, 'abc')
+    lcd.flush()
+    
+    address, data = host_stubs.i2c().writes[-1]
+    assert data == bytes([0x80, 0x80 | 0x44, 0x40]) + b'cba'
+    assert bytes(lcd._glass[16:21]) == b'  abc'
+    assert lcd._address == 0x41
+
+def test_glyph_upload_right_to_left():
+    lcd = lcd16x2.Lcd16x2()
+    lcd.right_to_left()
+    lcd.set_cursor(7, 0)
+    
+    lcd.define_glyph('ramp', list(range(8)))
+    assert lcd.glyph('ramp') == chr(0)
+    
+    writes = host_stubs.i2c().writes
+    assert writes[-2][1] == bytes([0x80, 0x40 | 7, 0x40, 7, 6, 5, 4, 3, 2, 1, 0])
+    assert _last_command(lcd) == (0x80, 0x80 | 0x07)
+
+if __name__ == '__main__':
+    test_glyph_upload_after_full_row_flush()
+    test_glyph_upload_restores_cursor()
+    test_write_past_row_end_stays_off_screen()
+    test_write_wraps_to_next_row()
+    test_text_rejects_out_of_range()
+    test_write_right_to_left()
+    test_flush_right_to_left()
+    test_glyph_upload_right_to_left()
+    print('OK')
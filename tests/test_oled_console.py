@@ -0,0 +1,41 @@
+# ------------------------------------------------------------------------------------------
+# Copyright James A. Dooley 2021.
+#
+# Distributed under the MIT License.
+# (See accompanying file license.md file or copy at http://opensource.org/licenses/MIT)
+#
+# ------------------------------------------------------------------------------------------
+
+# Host checks for the OLED console, run with: python -m pytest tests
+
+import host_stubs
+
+oled = host_stubs.load('oled-ssd1315')
+
+def test_append_writes_one_row_and_scrolls():
+    display = oled.OledSSD1315()
+    console = display.console()
+    writes = host_stubs.i2c().writes
+    
+    for i in range(12):
+        count = len(writes)
+        console.append('Line {}'.format(i))
+        
+        # One command transaction and one data row per line, whatever is on screen
+        assert len(writes) - count == 2
+        
+        commands = writes[-2][1]
+        row = writes[-1][1]
+        page = i if i < 8 else i - 8
+        start = 0 if i < 8 else (i - 7) << 3
+        assert commands == bytes((0x00, 0x21, 0, 127, 0x22, page, page, 0x40 | start))
+        assert len(row) == 129 and row[0] == 0x40
+
+def test_append_clears_the_rest_of_the_row():
+    display = oled.OledSSD1315()
+    console = display.console()
+    
+    console.append('A long line of text')
+    console.append('')
+    
+    assert host_stubs.i2c().writes[-1][1][1:] == bytes(128)
@@ -0,0 +1,112 @@
+# ------------------------------------------------------------------------------------------
+# Copyright James A. Dooley 2021.
+#
+# Distributed under the MIT License.
+# (See accompanying file license.md file or copy at http://opensource.org/licenses/MIT)
+#
+# ------------------------------------------------------------------------------------------
+
+# Host checks for OledSSD1315 text rendering and the font modules footprint() imports, run
+# with: python -m pytest tests
+
+import os
+
+import host_stubs
+
+oled = host_stubs.load('oled-ssd1315')
+measure = host_stubs.load('sundry/measure')
+
+_WIDTH = 128
+
+def _glyph(char, width = 8):
+    offset = (ord(char) - 32) * 8
+    return oled._FONT[offset:offset + width]
+
+def _page(display, page):
+    offset = page * _WIDTH + 1
+    return bytes(display._buffer[offset:offset + _WIDTH])
+
+def test_glyph_offset_clamps_to_ascii():
+    assert oled._glyph_offset('A') == (ord('A') - 32) * 8
+    assert oled._glyph_offset('\x7f') == 95 * 8
+    assert oled._glyph_offset('\n') == 0
+    assert oled._glyph_offset('é') == 0
+
+def test_compact_glyphs():
+    display = oled.OledSSD1315(glyph_width = 6)
+    display.string(0, 1, 'AB', draw = False)
+    
+    page = _page(display, 0)
+    assert page[:6] == bytes(6)
+    assert page[6:12] == _glyph('A', 6)
+    assert page[12:18] == _glyph('B', 6)
+    assert page[18:] == bytes(_WIDTH - 18)
+
+def test_compact_glyphs_fit_21_per_row():
+    display = oled.OledSSD1315(glyph_width = 6)
+    display.string(0, 0, 'H' * 30, draw = False)
+    
+    page = _page(display, 0)
+    assert page[:126] == _glyph('H', 6) * 21
+    assert page[126:] == bytes(2)
+    assert display._dirty_end[0] == 126
+
+def test_double_size_glyphs():
+    display = oled.OledSSD1315()
+    display.string(2, 1, 'A', draw = False, scale = 2)
+    
+    top = _page(display, 2)[16:32]
+    bottom = _page(display, 3)[16:32]
+    
+    for j, bits in enumerate(_glyph('A')):
+        # Every pixel row doubled, every column twice
+        column = 0
+        for bit in range(8):
+            if bits & (1 << bit):
+                column |= 3 << (2 * bit)
+        
+        for x in (2 * j, 2 * j + 1):
+            assert top[x] == column & 0xFF
+            assert bottom[x] == column >> 8
+
+def test_render_clips_to_row_end():
+    display = oled.OledSSD1315()
+    display.string(0, 14, 'ABCD', draw = False)
+    
+    page = _page(display, 0)
+    assert page[112:120] == _glyph('A')
+    assert page[120:128] == _glyph('B')
+    assert _page(display, 1) == bytes(_WIDTH)
+
+def test_render_clips_double_size():
+    display = oled.OledSSD1315()
+    before = bytes(display._buffer)
+    
+    # Off the right edge, and a bottom row with no room for the second page
+    display.string(0, 8, 'A', draw = False, scale = 2)
+    display.string(7, 0, 'A', draw = False, scale = 2)
+    
+    assert bytes(display._buffer) == before
+    
+    display.string(0, 6, 'ABC', draw = False, scale = 2)
+    assert _page(display, 0)[96:112] != bytes(16)
+    assert _page(display, 0)[112:] != bytes(16)
+
+def test_font_modules_match(tmp_path):
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        fonts = {}
+        for layout in ('bytes', 'lists'):
+            measure.write_font_module('_font_' + layout, oled._FONT, oled._GLYPH_SIZE, layout)
+            
+            namespace = {}
+            with open('_font_' + layout + '.py') as file:
+                exec(file.read(), namespace)
+            fonts[layout] = namespace['FONT']
+    finally:
+        os.chdir(cwd)
+    
+    assert fonts['bytes'] == oled._FONT
+    assert len(fonts['lists']) == len(oled._FONT) // oled._GLYPH_SIZE
+    assert bytes(b for glyph in fonts['lists'] for b in glyph) == oled._FONT